@@ -0,0 +1,375 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from itertools import islice
+
+from bisect import bisect_left, bisect_right
+
+from bplustree import BPlusTree
+from cow import CowBTree
+from latched import ConcurrentBTree
+from main import BTree
+from paged import PagedBTree
+
+
+class RecursiveBisectBTree(BTree):
+    """Recursive search/insert/delete/traverse as they stood just before
+    the loop-based rewrite, bisect lookups included. Against BTree this
+    isolates the cost of the recursion itself."""
+
+    def search_node(self, node, key):
+        i = bisect_left(node.keys, key)
+        if i < node.k and key == node.keys[i]:
+            return (node, i)
+        if node.leaf:
+            return None
+        return self.search_node(node.children[i], key)
+
+    def _insert_nonfull(self, x, key):
+        if self.counted:
+            x.size += 1
+        if x.leaf:
+            x.keys.insert(bisect_right(x.keys, key), key)
+            return
+        i = bisect_right(x.keys, key)
+        if x.children[i].k == 2 * self.t - 1:
+            self.split_child(x, i)
+            if key > x.keys[i]:
+                i += 1
+        self._insert_nonfull(x.children[i], key)
+
+    def _traverse_node(self, x, out):
+        if x.leaf:
+            out.extend(x.keys)
+        else:
+            for i, key in enumerate(x.keys):
+                self._traverse_node(x.children[i], out)
+                out.append(key)
+            self._traverse_node(x.children[x.k], out)
+
+    def _delete_from_node(self, x, key):
+        i = bisect_left(x.keys, key)
+        if i < x.k and x.keys[i] == key:
+            if x.leaf:
+                x.keys.pop(i)
+            else:
+                child, key = self._delete_from_internal(x, i)
+                self._delete_from_node(child, key)
+            if self.counted:
+                x.size -= 1
+            return True
+        if x.leaf:
+            return False
+        if x.children[i].k == self.t - 1:
+            self._fill_child(x, i)
+            if i > x.k:
+                i -= 1
+        removed = self._delete_from_node(x.children[i], key)
+        if removed and self.counted:
+            x.size -= 1
+        return removed
+
+
+class BaselineBTree(RecursiveBisectBTree):
+    """The original recursive BTree: linear key scans in every node, and
+    delete recursing through _delete_from_internal."""
+
+    def search_node(self, node, key):
+        i = 0
+        k = node.k
+        while i < k and key > node.keys[i]:
+            i += 1
+        if i < k and key == node.keys[i]:
+            return (node, i)
+        if node.leaf:
+            return None
+        return self.search_node(node.children[i], key)
+
+    def _insert_nonfull(self, x, key):
+        if x.leaf:
+            i = x.k - 1
+            x.keys.append(None)
+            while i >= 0 and key < x.keys[i]:
+                x.keys[i + 1] = x.keys[i]
+                i -= 1
+            x.keys[i + 1] = key
+            return
+        i = x.k - 1
+        while i >= 0 and key < x.keys[i]:
+            i -= 1
+        i += 1
+        if x.children[i].k == 2 * self.t - 1:
+            self.split_child(x, i)
+            if key > x.keys[i]:
+                i += 1
+        self._insert_nonfull(x.children[i], key)
+
+    def _delete_from_node(self, x, key):
+        i = 0
+        while i < x.k and key > x.keys[i]:
+            i += 1
+        if i < x.k and x.keys[i] == key:
+            if x.leaf:
+                x.keys.pop(i)
+            else:
+                child, key = self._delete_from_internal(x, i)
+                self._delete_from_node(child, key)
+            return True
+        if x.leaf:
+            return False
+        if x.children[i].k == self.t - 1:
+            self._fill_child(x, i)
+            if i > x.k:
+                i -= 1
+        return self._delete_from_node(x.children[i], key)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def build_by_insert(keys, t):
+    tree = BTree(t)
+    for k in keys:
+        tree.insert(k)
+    return tree
+
+
+def bench_bulk_load(sizes=(10_000, 100_000, 1_000_000), t=64):
+    print(f"bulk load vs repeated insert (t={t})")
+    for n in sizes:
+        keys = list(range(n))
+        shuffled = random.sample(keys, n)
+
+        _, t_insert = timed(lambda: build_by_insert(keys, t))
+        _, t_sorted = timed(lambda: BTree.from_sorted(keys, t))
+        _, t_unsorted = timed(lambda: BTree.from_unsorted(shuffled, t))
+        print(f"  n={n:>9,}  insert {t_insert:7.3f}s  "
+              f"from_sorted {t_sorted:7.3f}s ({t_insert / t_sorted:5.1f}x)  "
+              f"from_unsorted {t_unsorted:7.3f}s")
+
+
+def bench_lookup(n=200_000, ts=(16, 128, 1024), lookups=100_000):
+    print(f"search latency and memory (n={n:,})")
+    probes = [random.randrange(n) for _ in range(lookups)]
+    for t in ts:
+        for compact in (False, True):
+            # keys are created while tracing so list nodes pay for their ints
+            tracemalloc.start()
+            tree = BTree.from_sorted(range(n), t, compact=compact)
+            mem, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            search = tree.search
+            _, elapsed = timed(lambda: [search(k) for k in probes])
+            label = "array" if compact else "list"
+            print(f"  t={t:<5} {label:<5}  {elapsed / lookups * 1e6:6.2f}us/search  "
+                  f"{mem / n:6.1f} B/key")
+
+
+def bench_range_pages(n=1_000_000, t=64, page=100, pages=1_000):
+    print(f"{page}-key pages out of {n:,} keys (t={t})")
+    tree = BTree.from_sorted(range(n), t)
+    starts = [random.randrange(n) for _ in range(pages)]
+
+    _, elapsed = timed(lambda: [list(islice(tree.iter_from(s), page)) for s in starts])
+    print(f"  iter_from      {elapsed / pages * 1e6:9.1f}us/page")
+    _, elapsed = timed(lambda: tree.inorder_keys())
+    print(f"  inorder_keys   {elapsed * 1e3:9.1f}ms for one full traversal"
+          f" (what each page cost before iter_from)")
+
+
+def bench_bplus(n=200_000, t=64, lookups=100_000):
+    print(f"B+ tree point lookups and full scans (n={n:,}, t={t})")
+    keys = random.sample(range(n), n)
+    probes = [random.randrange(n) for _ in range(lookups)]
+    bp = BPlusTree(t)
+    for k in keys:
+        bp.put(k, k)
+    bt = BTree.from_sorted(range(n), t)
+
+    get = bp.get
+    _, elapsed = timed(lambda: [get(k) for k in probes])
+    print(f"  BPlusTree.get   {elapsed / lookups * 1e6:6.2f}us/op")
+    _, elapsed = timed(lambda: sum(1 for _ in bp.scan()))
+    print(f"  BPlusTree.scan  {elapsed / n * 1e9:6.1f}ns/key")
+    _, elapsed = timed(lambda: sum(1 for _ in bt))
+    print(f"  BTree iter      {elapsed / n * 1e9:6.1f}ns/key")
+
+
+def bench_paged(n=200_000, t=128, cache_pages=256, lookups=20_000):
+    print(f"paged tree (n={n:,}, t={t}, {cache_pages} cached pages)")
+    path = os.path.join(tempfile.mkdtemp(), "bench.pages")
+    keys = random.sample(range(n), n)
+    with PagedBTree(path, t, cache_pages) as tree:
+        _, elapsed = timed(lambda: [tree.insert(k) for k in keys])
+        print(f"  insert      {elapsed / n * 1e6:7.2f}us/op")
+
+    tree, elapsed = timed(lambda: PagedBTree(path, cache_pages=cache_pages))
+    print(f"  reopen      {elapsed * 1e3:7.2f}ms for {os.path.getsize(path) >> 20} MiB")
+    probes = [random.randrange(n) for _ in range(lookups)]
+    search = tree.search
+    _, elapsed = timed(lambda: [search(k) for k in probes])
+    print(f"  search      {elapsed / lookups * 1e6:7.2f}us/op")
+    tree.close()
+
+
+def bench_batches(n=200_000, batch=10_000, t=64):
+    print(f"batched vs single-key updates (n={n:,}, batches of {batch:,}, t={t})")
+    keys = random.sample(range(n), n)
+    batches = [keys[i:i + batch] for i in range(0, n, batch)]
+
+    single = BTree(t)
+    _, t_single = timed(lambda: [single.insert(k) for k in keys])
+    batched = BTree(t)
+    _, t_batched = timed(lambda: [batched.insert_many(b) for b in batches])
+    print(f"  insert       {t_single:7.3f}s  insert_many {t_batched:7.3f}s "
+          f"({t_single / t_batched:4.1f}x)")
+
+    _, t_single = timed(lambda: [single.delete(k) for k in keys])
+    _, t_batched = timed(lambda: [batched.delete_many(b) for b in batches])
+    print(f"  delete       {t_single:7.3f}s  delete_many {t_batched:7.3f}s "
+          f"({t_single / t_batched:4.1f}x)")
+
+
+def bench_order_stats(n=1_000_000, t=64):
+    print(f"percentiles with select() vs inorder_keys() (n={n:,}, t={t})")
+    tree = BTree.from_sorted(range(n), t, counted=True)
+    qs = [q / 100 for q in range(1, 100)]
+
+    _, elapsed = timed(lambda: [tree.select(int(q * (n - 1))) for q in qs])
+    print(f"  select        {elapsed * 1e3:8.2f}ms for {len(qs)} percentiles")
+
+    def from_list():
+        keys = tree.inorder_keys()
+        return [keys[int(q * (n - 1))] for q in qs]
+    _, elapsed = timed(from_list)
+    print(f"  inorder_keys  {elapsed * 1e3:8.2f}ms for {len(qs)} percentiles")
+
+
+def bench_iterative(n=100_000, ts=(2, 16, 128, 1024), ops=20_000):
+    print(f"original -> recursive with bisect -> loop-based operations (n={n:,})")
+    keys = random.sample(range(n), n)
+    probes = random.sample(range(n), ops)
+    for t in ts:
+        row = []
+        for cls in (BaselineBTree, RecursiveBisectBTree, BTree):
+            tree = BTree(t)
+            for k in keys:
+                tree.insert(k)
+            tree.__class__ = cls # same shape for all three, built the fast way
+            _, t_search = timed(lambda: [tree.search(k) for k in probes])
+            _, t_delete = timed(lambda: [tree.delete(k) for k in probes])
+            _, t_insert = timed(lambda: [tree.insert(k) for k in probes])
+            _, t_walk = timed(tree.inorder_keys)
+            row.append((t_search / ops * 1e6, t_insert / ops * 1e6, t_delete / ops * 1e6, t_walk * 1e3))
+        print(f"  t={t:<5} " + "  ".join(
+            f"{name} {' -> '.join(f'{r[j]:5.2f}' for r in row)}{unit}"
+            for j, (name, unit) in enumerate([("search", "us"), ("insert", "us"),
+                                              ("delete", "us"), ("traverse", "ms")])))
+
+
+class LockedBTree(BTree):
+    """One global lock around BTree, the baseline ConcurrentBTree replaces."""
+
+    def __init__(self, t):
+        super().__init__(t)
+        self.lock = threading.Lock()
+
+    def search(self, key):
+        with self.lock:
+            return super().search(key)
+
+    def insert(self, key):
+        with self.lock:
+            super().insert(key)
+
+
+def bench_concurrent(n=100_000, t=64, workers=(1, 2, 4, 8), seconds=1.0):
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"read throughput with one writer (n={n:,}, t={t}, "
+          f"{'GIL' if gil else 'free-threaded'} build)")
+    for cls in (LockedBTree, ConcurrentBTree):
+        for count in workers:
+            tree = cls(t)
+            for k in random.sample(range(n), n):
+                tree.insert(k)
+            stop = threading.Event()
+            reads = [0] * count
+
+            def reader(slot):
+                rnd = random.Random(slot)
+                done = 0
+                while not stop.is_set():
+                    tree.search(rnd.randrange(n))
+                    done += 1
+                reads[slot] = done
+
+            def writer():
+                k = n
+                while not stop.is_set():
+                    tree.insert(k)
+                    k += 1
+
+            threads = [threading.Thread(target=reader, args=(i,)) for i in range(count)]
+            threads.append(threading.Thread(target=writer))
+            for th in threads:
+                th.start()
+            time.sleep(seconds)
+            stop.set()
+            for th in threads:
+                th.join()
+            print(f"  {cls.__name__:<16} readers={count}  "
+                  f"{sum(reads) / seconds:12,.0f} searches/s")
+
+
+def bench_snapshots(n=200_000, t=64, writes=10_000, snapshots=(1, 10, 100)):
+    print(f"copy-on-write writes (n={n:,}, t={t}, {writes:,} inserts)")
+    keys = random.sample(range(n), n)
+    extra = random.sample(range(n, 2 * n), writes)
+    for cls in (BTree, CowBTree):
+        tree = cls(t)
+        for k in keys:
+            tree.insert(k)
+        tracemalloc.start() # traced like the runs below, so the rates compare
+        _, secs = timed(lambda: [tree.insert(k) for k in extra])
+        tracemalloc.stop()
+        print(f"  {cls.__name__:<10} no snapshots      {writes / secs:12,.0f} inserts/s")
+
+    for every in snapshots:
+        tree = CowBTree(t)
+        for k in keys:
+            tree.insert(k)
+        held = []
+        tracemalloc.start()
+
+        def run():
+            for j, k in enumerate(extra):
+                if j % (writes // every) == 0:
+                    held.append(tree.snapshot())
+                tree.insert(k)
+
+        _, secs = timed(run)
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  CowBTree   {len(held):>3} snapshots     {writes / secs:12,.0f} inserts/s"
+              f"  {mem / 2**20:7.1f} MiB kept")
+
+
+if __name__ == "__main__":
+    bench_bulk_load()
+    bench_lookup()
+    bench_range_pages()
+    bench_bplus()
+    bench_paged()
+    bench_batches()
+    bench_order_stats()
+    bench_iterative()
+    bench_concurrent()
+    bench_snapshots()
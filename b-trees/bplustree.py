@@ -0,0 +1,401 @@
+from bisect import bisect_left, bisect_right
+
+from main import BTree, Node, external_sort
+
+
+class Leaf(Node):
+    __slots__ = ("values", "next", "prev")
+
+    def __init__(self):
+        super().__init__(is_leaf=True)
+        self.values = []
+        self.next = None
+        self.prev = None
+
+
+class BPlusTree(BTree):
+    """Key-value B+ tree with doubly linked leaves.
+
+    Values live only in the leaves and every key is stored in exactly one
+    leaf. Internal nodes only hold routing copies: child i covers
+    keys[i-1] <= key < keys[i]. Internal nodes are split, rotated and
+    merged by the BTree methods unchanged; only the leaf cases are
+    overridden, because a leaf split copies its separator up instead of
+    moving it and a leaf merge drops the separator.
+    """
+
+    def __init__(self, t):
+        super().__init__(t)
+        self.root = Leaf()
+        self.n = 0
+
+    @classmethod
+    def from_sorted(cls, items, t, fill=1.0):
+        """Bulk-load from (key, value) pairs in non-decreasing key order;
+        for a repeated key the last value wins, as with put().
+
+        The pairs are packed into a chain of linked leaves of about
+        round(fill * (2t - 1)) keys, then each routing level is built
+        over the one below, with the smallest key of every child but the
+        first as its separator. Sizes are spread evenly across a level so
+        no node ends up short of the minimum.
+        """
+        if not 0 < fill <= 1:
+            raise ValueError("fill must be in (0, 1]")
+        keys, values = [], []
+        for key, value in items:
+            if keys and not keys[-1] <= key:
+                raise ValueError("keys must be sorted, use from_unsorted")
+            if keys and keys[-1] == key:
+                values[-1] = value
+            else:
+                keys.append(key)
+                values.append(value)
+
+        tree = cls(t)
+        tree.n = len(keys)
+        cap = max(t - 1, min(2 * t - 1, round(fill * (2 * t - 1))))
+        nodes = []
+        lows = [] # smallest key under each node of the current level
+        prev = None
+        for a, b in _even_split(len(keys), cap, t - 1, 2 * t - 1):
+            leaf = Leaf()
+            leaf.keys = keys[a:b]
+            leaf.values = values[a:b]
+            if prev is not None:
+                prev.next = leaf
+                leaf.prev = prev
+            prev = leaf
+            nodes.append(leaf)
+            lows.append(leaf.keys[0] if leaf.keys else None)
+
+        while len(nodes) > 1:
+            parents, parent_lows = [], []
+            for a, b in _even_split(len(nodes), cap + 1, t, 2 * t):
+                x = tree._new_node(is_leaf=False)
+                x.children = nodes[a:b]
+                x.keys = lows[a + 1:b]
+                parents.append(x)
+                parent_lows.append(lows[a])
+            nodes, lows = parents, parent_lows
+        if nodes:
+            tree.root = nodes[0]
+        return tree
+
+    @classmethod
+    def from_unsorted(cls, items, t, fill=1.0, run_size=1_000_000):
+        """Bulk-load from (key, value) pairs in any order, sorted with
+        external_sort. Pairs are tagged with their position so values are
+        never compared and the last value of a repeated key wins."""
+        tagged = ((key, i, value) for i, (key, value) in enumerate(items))
+        return cls.from_sorted(((k, v) for k, _, v in external_sort(tagged, run_size)), t, fill)
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def _find_leaf(self, key):
+        x = self.root
+        while not x.leaf:
+            x = x.children[bisect_right(x.keys, key)]
+        return x
+
+    def _first_leaf(self):
+        x = self.root
+        while not x.leaf:
+            x = x.children[0]
+        return x
+
+    def _last_leaf(self):
+        x = self.root
+        while not x.leaf:
+            x = x.children[x.k]
+        return x
+
+    def search_node(self, node, key):
+        # internal keys are routing copies, a key is only found in its leaf
+        while not node.leaf:
+            node = node.children[bisect_right(node.keys, key)]
+        i = bisect_left(node.keys, key)
+        if i < node.k and node.keys[i] == key:
+            return (node, i)
+        return None
+
+    def search(self, key):
+        return self.search_node(self.root, key)
+
+    def get(self, key, default=None):
+        found = self.search(key)
+        if found is None:
+            return default
+        leaf, i = found
+        return leaf.values[i]
+
+    def put(self, key, value):
+        t = self.t
+        r = self.root
+        if r.k == 2 * t - 1:
+            s = self._new_node(is_leaf=False)
+            s.children.append(r)
+            self.root = s
+            self.split_child(s, 0)
+
+        x = self.root
+        while not x.leaf:
+            i = bisect_right(x.keys, key)
+            if x.children[i].k == 2 * t - 1:
+                self.split_child(x, i)
+                if key >= x.keys[i]:
+                    i += 1
+            x = x.children[i]
+
+        i = bisect_left(x.keys, key)
+        if i < x.k and x.keys[i] == key:
+            x.values[i] = value
+        else:
+            x.keys.insert(i, key)
+            x.values.insert(i, value)
+            self.n += 1
+
+    def insert(self, key, value=None):
+        self.put(key, value)
+
+    # the batch passes in BTree move separators down and split leaves the
+    # B-tree way, so batches go through the B+ tree paths one key at a time
+
+    def insert_many(self, keys):
+        for key in keys:
+            self.put(key, None)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def delete(self, key):
+        # same proactive scheme as BTree.delete: every child we step into
+        # gets at least t keys first, so removing from the leaf never
+        # leaves it short
+        x = self.root
+        while not x.leaf:
+            i = bisect_right(x.keys, key)
+            if x.children[i].k == self.t - 1:
+                self._fill_child(x, i)
+                i = bisect_right(x.keys, key)
+            x = x.children[i]
+
+        i = bisect_left(x.keys, key)
+        if i < x.k and x.keys[i] == key:
+            x.keys.pop(i)
+            x.values.pop(i)
+            self.n -= 1
+
+        if self.root.k == 0 and not self.root.leaf:
+            self.root = self.root.children[0]
+
+    def scan(self, lo=None, hi=None, reverse=False):
+        """Yield (key, value) pairs with lo <= key < hi by walking the leaf chain."""
+        if reverse:
+            if hi is None:
+                leaf = self._last_leaf()
+                return self._walk_backward(leaf, leaf.k, lo)
+            leaf = self._find_leaf(hi)
+            return self._walk_backward(leaf, bisect_left(leaf.keys, hi), lo)
+        if lo is None:
+            return self._walk_forward(self._first_leaf(), 0, hi)
+        leaf = self._find_leaf(lo)
+        return self._walk_forward(leaf, bisect_left(leaf.keys, lo), hi)
+
+    def _walk_forward(self, leaf, i, hi):
+        while leaf is not None:
+            keys, values = leaf.keys, leaf.values
+            for j in range(i, leaf.k):
+                if hi is not None and not keys[j] < hi:
+                    return
+                yield keys[j], values[j]
+            leaf = leaf.next
+            i = 0
+
+    def _walk_backward(self, leaf, i, lo):
+        while leaf is not None:
+            keys, values = leaf.keys, leaf.values
+            for j in range(i - 1, -1, -1):
+                if lo is not None and keys[j] < lo:
+                    return
+                yield keys[j], values[j]
+            leaf = leaf.prev
+            if leaf is not None:
+                i = leaf.k
+
+    # ordered key iteration goes through the leaf chain, internal keys are
+    # only routing copies here
+
+    def __iter__(self):
+        return (k for k, _ in self.scan())
+
+    def __reversed__(self):
+        return (k for k, _ in self.scan(reverse=True))
+
+    def iter_from(self, key=None, reverse=False):
+        if key is None:
+            pairs = self.scan(reverse=reverse)
+        else:
+            leaf = self._find_leaf(key)
+            if reverse:
+                pairs = self._walk_backward(leaf, bisect_right(leaf.keys, key), None)
+            else:
+                pairs = self._walk_forward(leaf, bisect_left(leaf.keys, key), None)
+        return (k for k, _ in pairs)
+
+    def range(self, lo=None, hi=None, reverse=False):
+        return (k for k, _ in self.scan(lo, hi, reverse))
+
+    def inorder_keys(self):
+        return list(self)
+
+    # order statistics: there are no subtree counts here (internal nodes
+    # are shared with BTree's split/merge code, which does not keep them
+    # for leaves holding values), so these walk the leaf chain in O(n / t)
+
+    def rank(self, key) -> int:
+        """Number of keys strictly less than key."""
+        target = self._find_leaf(key)
+        r = 0
+        leaf = self._first_leaf()
+        while leaf is not target:
+            r += leaf.k
+            leaf = leaf.next
+        return r + bisect_left(leaf.keys, key)
+
+    def select(self, k: int):
+        """The k-th smallest key, counting from 0."""
+        if not 0 <= k < self.n:
+            raise IndexError("select index out of range")
+        leaf = self._first_leaf()
+        while k >= leaf.k:
+            k -= leaf.k
+            leaf = leaf.next
+        return leaf.keys[k]
+
+    def count_range(self, lo=None, hi=None) -> int:
+        """Number of keys with lo <= key < hi, matching range()."""
+        below_hi = self.n if hi is None else self.rank(hi)
+        below_lo = 0 if lo is None else self.rank(lo)
+        return max(0, below_hi - below_lo)
+
+    # leaf cases of the structural helpers; internal nodes use BTree's
+
+    def split_child(self, x: Node, i: int):
+        y = x.children[i]
+        if not y.leaf:
+            super().split_child(x, i)
+            return
+        mid = self.t - 1
+        z = Leaf()
+        z.keys = y.keys[mid:]
+        z.values = y.values[mid:]
+        y.keys = y.keys[:mid]
+        y.values = y.values[:mid]
+
+        z.next = y.next
+        if y.next is not None:
+            y.next.prev = z
+        y.next = z
+        z.prev = y
+
+        x.children.insert(i + 1, z)
+        x.keys.insert(i, z.keys[0]) # copied up, z keeps it
+
+    def _borrow_from_prev(self, x: Node, idx: int):
+        child = x.children[idx]
+        if not child.leaf:
+            super()._borrow_from_prev(x, idx)
+            return
+        sibling = x.children[idx - 1]
+        child.keys.insert(0, sibling.keys.pop())
+        child.values.insert(0, sibling.values.pop())
+        x.keys[idx - 1] = child.keys[0]
+
+    def _borrow_from_next(self, x: Node, idx: int):
+        child = x.children[idx]
+        if not child.leaf:
+            super()._borrow_from_next(x, idx)
+            return
+        sibling = x.children[idx + 1]
+        child.keys.append(sibling.keys.pop(0))
+        child.values.append(sibling.values.pop(0))
+        x.keys[idx] = sibling.keys[0]
+
+    def _merge_children(self, x: Node, idx: int):
+        child = x.children[idx]
+        if not child.leaf:
+            super()._merge_children(x, idx)
+            return
+        sibling = x.children[idx + 1]
+        child.keys.extend(sibling.keys)
+        child.values.extend(sibling.values)
+
+        child.next = sibling.next
+        if sibling.next is not None:
+            sibling.next.prev = child
+
+        x.keys.pop(idx) # separator is only a routing copy, drop it
+        x.children.pop(idx + 1)
+
+
+def _even_split(m, target, low, high):
+    """(start, stop) slices cutting m items into nodes of about target
+    items, each between low and high; a lone node may hold fewer."""
+    count = max(1, round(m / target))
+    count = max(count, -(-m // high))
+    count = min(count, max(1, m // low)) if low else count
+    size, extra = divmod(m, count)
+    start = 0
+    for j in range(count):
+        stop = start + size + (j < extra)
+        yield start, stop
+        start = stop
+
+
+if __name__ == "__main__":
+    bp = BPlusTree(3)
+    for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 5, 42, 765, 34, 2, 4, 1]:
+        bp.put(k, str(k))
+
+    assert bp.get(42) == "42"
+    assert bp.get(43) is None
+    bp.put(42, "forty-two")
+    assert bp.get(42) == "forty-two"
+    assert len(bp) == 16
+    print(list(bp.scan(10, 50)))
+    print(list(bp.scan(10, 50, reverse=True)))
+
+    for k in [765, 90, 80, 70, 60, 50, 40, 30, 20, 10, 5, 42, 34, 2, 4, 1]:
+        bp.delete(k)
+        print(bp.inorder_keys())
+    assert len(bp) == 0
+
+    import random
+    rnd = random.Random(5)
+    for t in (2, 3, 5):
+        for m in (0, 1, 2, 7, 100, 1000):
+            for fill in (0.5, 1.0):
+                pairs = [(rnd.randrange(3 * m + 1), i) for i in range(m)]
+                bp = BPlusTree.from_unsorted(pairs, t, fill=fill, run_size=50)
+                ref = dict(pairs) # last value of a repeated key wins
+                assert list(bp.scan()) == sorted(ref.items())
+                assert list(bp.scan(reverse=True)) == sorted(ref.items(), reverse=True)
+                keys = sorted(ref)
+                for i, key in enumerate(keys[::7]):
+                    assert bp.get(key) == ref[key]
+                    assert bp.rank(key) == 7 * i and bp.select(7 * i) == key
+                # still a valid tree to keep editing
+                for key in keys[::2]:
+                    bp.delete(key)
+                for key in range(0, 3 * m + 1, 5):
+                    bp.put(key, -key)
+                    ref[key] = -key
+                expect = sorted((k, v) for k, v in ref.items() if k % 5 == 0 or k not in keys[::2])
+                assert list(bp.scan()) == expect and len(bp) == len(expect)
+                assert bp.count_range(10, 40) == sum(1 for k, _ in expect if 10 <= k < 40)
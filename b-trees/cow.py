@@ -0,0 +1,190 @@
+from bisect import bisect_left, bisect_right
+
+from main import BTree, CompactNode, Node
+
+
+class CowNode(Node):
+    __slots__ = ("gen",)
+
+
+class CowCompactNode(CompactNode):
+    __slots__ = ("gen",)
+
+
+class CowBTree(BTree):
+    """BTree with O(1) copy-on-write snapshots.
+
+    Every node carries the generation it was created in, and snapshot()
+    starts a new generation. A write copies a node from an older
+    generation before it touches it and repoints the (already copied)
+    parent at the copy, so insert and delete copy just the nodes on their
+    path plus any sibling a borrow or merge changes. Snapshots keep the
+    old nodes alive, so each one costs memory in proportion to the writes
+    made after it was taken.
+
+    The batch methods apply their keys one at a time through insert and
+    delete so every change goes through the path copying.
+    """
+
+    def __init__(self, t, compact=False, counted=False):
+        self.node_cls = CowCompactNode if compact else CowNode
+        self.t = t
+        self.counted = counted
+        self._gen = 0
+        self.root = self._new_node(is_leaf=True)
+
+    def _new_node(self, is_leaf: bool) -> Node:
+        node = self.node_cls(is_leaf)
+        node.gen = self._gen
+        return node
+
+    def snapshot(self):
+        """Read-only view of the tree as it is now, in O(1)."""
+        snap = BTreeSnapshot(self.root, self.t, self.counted)
+        self._gen += 1 # from here on every existing node is shared
+        return snap
+
+    def _own(self, x: Node) -> Node:
+        if x.gen == self._gen:
+            return x
+        copy = self._new_node(is_leaf=x.leaf)
+        copy.keys = x.keys[:]
+        copy.children = list(x.children)
+        copy.size = x.size
+        return copy
+
+    def _own_child(self, x: Node, i: int) -> Node:
+        # x must already be owned
+        child = x.children[i]
+        if child.gen != self._gen:
+            child = self._own(child)
+            x.children[i] = child
+        return child
+
+    def insert(self, key: int):
+        self.root = self._own(self.root)
+        super().insert(key)
+
+    def insert_many(self, keys):
+        for key in keys:
+            self.insert(key)
+
+    def _insert_nonfull(self, x: Node, key: int):
+        full = 2 * self.t - 1
+        while True:
+            if self.counted:
+                x.size += 1
+            if x.leaf:
+                x.keys.insert(bisect_right(x.keys, key), key)
+                return
+
+            i = bisect_right(x.keys, key)
+            child = self._own_child(x, i)
+            if child.k == full:
+                self.split_child(x, i) # the new right half is already ours
+                if key > x.keys[i]:
+                    i += 1
+            x = x.children[i]
+
+    def delete(self, key):
+        if self.root.k == 0:
+            return
+        self.root = self._own(self.root)
+        super().delete(key)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def _delete_from_node(self, x: Node, key: int) -> bool:
+        path = []
+        while True:
+            path.append(x)
+            i = bisect_left(x.keys, key)
+
+            if i < x.k and x.keys[i] == key:
+                if x.leaf:
+                    x.keys.pop(i)
+                    break
+                x, key = self._delete_from_internal(x, i)
+                continue
+            if x.leaf:
+                return False
+
+            self._own_child(x, i)
+            if x.children[i].k == self.t - 1:
+                self._fill_child(x, i)
+                if i > x.k:
+                    i -= 1
+            x = self._own_child(x, i)
+
+        if self.counted:
+            for node in path:
+                node.size -= 1
+        return True
+
+    def _delete_from_internal(self, x: Node, idx: int):
+        key = x.keys[idx]
+        if x.children[idx].k >= self.t:
+            pred = self._get_predecessor(x, idx)
+            x.keys[idx] = pred
+            return self._own_child(x, idx), pred
+
+        if x.children[idx + 1].k >= self.t:
+            succ = self._get_successor(x, idx)
+            x.keys[idx] = succ
+            return self._own_child(x, idx + 1), succ
+
+        self._merge_children(x, idx)
+        return x.children[idx], key
+
+    # the structural helpers change the child and sometimes a sibling;
+    # make sure both are private copies before BTree's versions run
+
+    def _borrow_from_prev(self, x: Node, idx: int):
+        self._own_child(x, idx)
+        self._own_child(x, idx - 1)
+        super()._borrow_from_prev(x, idx)
+
+    def _borrow_from_next(self, x: Node, idx: int):
+        self._own_child(x, idx)
+        self._own_child(x, idx + 1)
+        super()._borrow_from_next(x, idx)
+
+    def _merge_children(self, x: Node, idx: int):
+        self._own_child(x, idx) # the right sibling is only read
+        super()._merge_children(x, idx)
+
+
+class BTreeSnapshot(BTree):
+    """Frozen view of a CowBTree. All the BTree read methods work on it."""
+
+    def __init__(self, root: Node, t, counted):
+        self.root = root
+        self.t = t
+        self.counted = counted
+
+    def _read_only(self, *args):
+        raise TypeError("BTree snapshots are read-only")
+
+    insert = insert_many = delete = delete_many = _read_only
+
+
+if __name__ == "__main__":
+    tree = CowBTree(3, counted=True)
+    for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 5, 42, 765, 34, 2, 4, 1]:
+        tree.insert(k)
+
+    before = tree.snapshot()
+    for k in [765, 90, 80, 70]:
+        tree.delete(k)
+    tree.insert(33)
+    after = tree.snapshot()
+    tree.insert(35)
+
+    print(before.inorder_keys())
+    print(after.inorder_keys())
+    print(tree.inorder_keys())
+    assert before.inorder_keys() == [1, 2, 4, 5, 10, 20, 30, 34, 40, 42, 50, 60, 70, 80, 90, 765]
+    assert after.select(0) == 1 and after.rank(40) == 9
+    assert 35 not in after.inorder_keys() and tree.search(35) is not None
@@ -0,0 +1,272 @@
+import threading
+from bisect import bisect_left, bisect_right
+
+from main import BTree, Node
+
+
+class RWLatch:
+    """Readers-writer latch. Waiting writers hold off new readers so a
+    steady stream of lookups cannot starve the writer."""
+    __slots__ = ("_cond", "_readers", "_writer", "_waiting")
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class LatchedNode(Node):
+    __slots__ = ("latch",)
+
+    def __init__(self, is_leaf: bool):
+        super().__init__(is_leaf)
+        self.latch = RWLatch()
+
+
+class ConcurrentBTree(BTree):
+    """Thread-safe BTree using per-node latches and latch crabbing.
+
+    Readers take a shared latch on a child before dropping the one on its
+    parent, so they only ever wait on nodes a writer is changing right now.
+    Writers latch exclusively on the way down and, like BTree.insert and
+    BTree.delete, split full children or fill short ones before stepping
+    into them. A child that has been made safe cannot pass a split or
+    merge back up, so the parent is released as soon as the child is held.
+    The root pointer has a latch of its own, held only while the root
+    itself might be replaced.
+
+    search, insert and delete are safe to call from any thread. The
+    batch methods go through insert/delete one key at a time. Iteration,
+    inorder_keys and the order statistics are not latched.
+    """
+
+    def __init__(self, t, compact=False, counted=False):
+        if compact or counted:
+            raise ValueError("ConcurrentBTree supports neither compact nor counted nodes")
+        self._root_latch = RWLatch()
+        super().__init__(t)
+        self.node_cls = LatchedNode
+        self.root = self._new_node(is_leaf=True)
+
+    def search(self, key):
+        self._root_latch.acquire_read()
+        x = self.root
+        x.latch.acquire_read()
+        self._root_latch.release_read()
+        try:
+            while True:
+                i = bisect_left(x.keys, key)
+                if i < x.k and x.keys[i] == key:
+                    return (x, i)
+                if x.leaf:
+                    return None
+                child = x.children[i]
+                child.latch.acquire_read()
+                x.latch.release_read()
+                x = child
+        finally:
+            x.latch.release_read()
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def insert(self, key):
+        full = 2 * self.t - 1
+        held = [self._root_latch]
+        self._root_latch.acquire_write()
+        try:
+            x = self._hold(held, self.root)
+            if x.k == full:
+                s = self._hold(held, self._new_node(is_leaf=False))
+                s.children.append(x)
+                self.split_child(s, 0)
+                self.root = s
+                self._drop(held, x)
+                x = s
+            # x is not full, so nothing below can split the root again
+            self._drop(held, self._root_latch)
+
+            while not x.leaf:
+                i = bisect_right(x.keys, key)
+                child = self._hold(held, x.children[i])
+                if child.k == full:
+                    self.split_child(x, i)
+                    if key > x.keys[i]:
+                        right = self._hold(held, x.children[i + 1])
+                        self._drop(held, child)
+                        child = right
+                self._drop(held, x)
+                x = child
+
+            x.keys.insert(bisect_right(x.keys, key), key)
+        finally:
+            self._drop_all(held)
+
+    def insert_many(self, keys):
+        for key in keys:
+            self.insert(key)
+
+    def delete(self, key):
+        t = self.t
+        held = [self._root_latch]
+        self._root_latch.acquire_write()
+        try:
+            x = self._hold(held, self.root)
+            if x.k == 0:
+                return # nothing to delete
+            at_root = True
+            while True:
+                i = bisect_left(x.keys, key)
+                if i < x.k and x.keys[i] == key:
+                    if x.leaf:
+                        x.keys.pop(i)
+                        return
+                    left = self._hold(held, x.children[i])
+                    right = self._hold(held, x.children[i + 1])
+                    if left.k >= t:
+                        self._drop(held, right)
+                        x.keys[i] = self._pop_edge(held, left, last=True)
+                        return
+                    if right.k >= t:
+                        self._drop(held, left)
+                        x.keys[i] = self._pop_edge(held, right, last=False)
+                        return
+                    # both children have only t-1 keys
+                    self._merge_children(x, i)
+                    self._drop(held, right)
+                    child = left
+                elif x.leaf:
+                    return
+                else:
+                    child = self._make_safe(held, x, i)
+
+                if at_root:
+                    if x.k == 0:
+                        self.root = child # the merge emptied the root
+                    self._drop(held, self._root_latch)
+                    at_root = False
+                self._drop(held, x)
+                x = child
+        finally:
+            self._drop_all(held)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def _make_safe(self, held, x: Node, idx: int) -> Node:
+        # latch child idx, top it up to t keys if needed and return
+        # whichever node now covers its range, still latched
+        child = self._hold(held, x.children[idx])
+        if child.k != self.t - 1:
+            return child
+        siblings = []
+        if idx > 0:
+            siblings.append(self._hold(held, x.children[idx - 1]))
+        if idx < x.k:
+            siblings.append(self._hold(held, x.children[idx + 1]))
+        self._fill_child(x, idx)
+        if idx > x.k:
+            idx -= 1 # merged into the left sibling
+        target = x.children[idx]
+        for node in [child, *siblings]:
+            if node is not target:
+                self._drop(held, node)
+        return target
+
+    def _pop_edge(self, held, x: Node, last: bool):
+        # remove and return the largest (or smallest) key under x, filling
+        # children on the way down. The caller keeps the parent latched
+        # until the key is placed, so no writer can slip a key past it
+        keep = x
+        while not x.leaf:
+            idx = x.k if last else 0
+            child = self._make_safe(held, x, idx)
+            if x is not keep:
+                self._drop(held, x)
+            x = child
+        key = x.keys.pop() if last else x.keys.pop(0)
+        if x is not keep:
+            self._drop(held, x)
+        return key
+
+    def _hold(self, held, x: Node) -> Node:
+        x.latch.acquire_write()
+        held.append(x.latch)
+        return x
+
+    def _drop(self, held, x):
+        latch = x if isinstance(x, RWLatch) else x.latch
+        held.remove(latch)
+        latch.release_write()
+
+    def _drop_all(self, held):
+        while held:
+            held.pop().release_write()
+
+
+if __name__ == "__main__":
+    import random
+
+    tree = ConcurrentBTree(4)
+    stable = set(range(0, 1000, 3)) # never deleted, readers must always find them
+    for k in stable:
+        tree.insert(k)
+
+    stop = threading.Event()
+    misses = []
+
+    def reader():
+        while not stop.is_set():
+            k = random.choice(tuple(stable))
+            if tree.search(k) is None:
+                misses.append(k)
+
+    def writer(chunk):
+        for k in chunk:
+            tree.insert(k)
+        for k in chunk[::2]:
+            tree.delete(k)
+
+    fresh = random.sample(range(1000, 20_000), 6_000)
+    chunks = [fresh[i::3] for i in range(3)]
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(c,)) for c in chunks]
+    for th in readers + writers:
+        th.start()
+    for th in writers:
+        th.join()
+    stop.set()
+    for th in readers:
+        th.join()
+
+    expected = stable.union(*(c[1::2] for c in chunks))
+    assert tree.inorder_keys() == sorted(expected)
+    assert not misses
+    print("ok", len(expected))
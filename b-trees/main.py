@@ -1,8 +1,19 @@
+import heapq
+import pickle
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+
 class Node:
+    __slots__ = ("keys", "children", "leaf", "size")
+
     def __init__(self, is_leaf: bool):
         self.keys = []
         self.children = []
         self.leaf = is_leaf
+        self.size = 0 # keys in this subtree, kept up to date only when counted
     
     @property
     def k(self):
@@ -15,127 +26,655 @@ class Node:
 \nk: {self.k}"""
 
 
+class CompactNode(Node):
+    """Node for integer keys that keeps them in a packed array('q').
+
+    Eight bytes per key instead of a pointer to a boxed int, and slicing,
+    insert, pop and bisect all work on the array the same way they do on
+    a list, so the tree code does not need to know which one it holds.
+    """
+    __slots__ = ()
+
+    def __init__(self, is_leaf: bool):
+        super().__init__(is_leaf)
+        self.keys = array("q")
+
+
+def external_sort(keys, run_size=1_000_000):
+    """Yield keys in sorted order, spilling sorted runs to temp files.
+
+    Inputs that fit in a single run are sorted in memory. Larger inputs
+    are cut into runs of run_size keys, each run is sorted and pickled to
+    its own temporary file, and the runs are streamed back through
+    heapq.merge so only one block per run is resident at a time.
+    """
+    runs = []
+    run = []
+    try:
+        for key in keys:
+            run.append(key)
+            if len(run) >= run_size:
+                runs.append(_spill_run(sorted(run)))
+                run = []
+        run.sort()
+        if not runs:
+            yield from run
+            return
+        if run:
+            runs.append(_spill_run(run))
+        yield from heapq.merge(*(_read_run(f) for f in runs))
+    finally:
+        for f in runs:
+            f.close()
+
+
+def _spill_run(run, block=4096):
+    f = tempfile.TemporaryFile()
+    for i in range(0, len(run), block):
+        pickle.dump(run[i:i + block], f, protocol=pickle.HIGHEST_PROTOCOL)
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    while True:
+        try:
+            block = pickle.load(f)
+        except EOFError:
+            return
+        yield from block
+
+
+def _takewhile_lt(keys, hi):
+    for key in keys:
+        if not key < hi:
+            return
+        yield key
+
+
+def _takewhile_ge(keys, lo):
+    for key in keys:
+        if key < lo:
+            return
+        yield key
+
+
 class BTree:
-    def __init__(self, t):
-        self.root = Node(is_leaf=True)
+    def __init__(self, t, compact=False, counted=False):
+        self.node_cls = CompactNode if compact else Node
         self.t = t
+        self.counted = counted
+        self.root = self._new_node(is_leaf=True)
+
+    def _new_node(self, is_leaf: bool) -> Node:
+        return self.node_cls(is_leaf)
+
+    @classmethod
+    def from_sorted(cls, keys, t, fill=1.0, compact=False, counted=False):
+        """Bulk-load a tree from keys in non-decreasing order in one pass.
+
+        Leaves are packed left to right with round(fill * (2t - 1)) keys
+        (never fewer than t - 1), and the key that closes a node is pushed
+        up as a separator into the open node one level higher. Only the
+        right spine is left underfull, and it is fixed at the end with
+        the regular borrow/merge helpers.
+        """
+        if not 0 < fill <= 1:
+            raise ValueError("fill must be in (0, 1]")
+        tree = cls(t, compact=compact, counted=counted)
+        tree._load_sorted(keys, fill)
+        if counted:
+            tree._recount()
+        return tree
+
+    def _load_sorted(self, keys, fill):
+        # the packing loop of from_sorted, on an empty tree
+        tree, t = self, self.t
+        cap = max(t - 1, min(2 * t - 1, round(fill * (2 * t - 1))))
+
+        levels = [tree.root] # levels[h] is the open (rightmost) node at height h
+        prev = None
+        first = True
+        for key in keys:
+            if not first and key < prev:
+                raise ValueError("keys must be sorted, use from_unsorted")
+            prev = key
+            first = False
+
+            leaf = levels[0]
+            if leaf.k < cap:
+                leaf.keys.append(key)
+                continue
+
+            # leaf is closed, key becomes the separator to its right
+            h = 1
+            closed = leaf
+            levels[0] = tree._new_node(is_leaf=True)
+            while True:
+                if h == len(levels):
+                    levels.append(tree._new_node(is_leaf=False))
+                parent = levels[h]
+                parent.children.append(closed)
+                tree._sealed(closed)
+                if parent.k < cap:
+                    parent.keys.append(key)
+                    break
+                # parent is full too, close it and carry the key up
+                closed = parent
+                levels[h] = tree._new_node(is_leaf=False)
+                h += 1
+
+        # attach every open node to the open node above it
+        for h in range(len(levels) - 1):
+            levels[h + 1].children.append(levels[h])
+        tree.root = levels[-1]
+        tree._fix_right_spine()
+
+    def _sealed(self, x: Node):
+        # called by _load_sorted once x is closed and will not change again
+        pass
+
+    @classmethod
+    def from_unsorted(cls, keys, t, fill=1.0, compact=False, counted=False,
+                      run_size=1_000_000):
+        """Bulk-load from keys in any order, sorting them with external_sort."""
+        return cls.from_sorted(external_sort(keys, run_size), t, fill, compact, counted)
+
+    def _fix_right_spine(self):
+        # after a bulk load only the rightmost node of each level can be
+        # short of t - 1 keys; a merge can push the shortage one level up,
+        # so sweep the spine until a pass makes no merges
+        merged = True
+        while merged:
+            merged = False
+            x = self.root
+            while not x.leaf:
+                idx = x.k # rightmost child
+                child = x.children[idx]
+                if idx > 0 and child.k < self.t - 1:
+                    sibling = x.children[idx - 1]
+                    if sibling.k + child.k >= 2 * (self.t - 1):
+                        # enough keys for both, shift them over one at a time
+                        while child.k < self.t - 1:
+                            self._borrow_from_prev(x, idx)
+                    else:
+                        self._merge_children(x, idx - 1)
+                        merged = True
+                x = x.children[x.k]
+
+            while self.root.k == 0 and not self.root.leaf:
+                self.root = self.root.children[0]
     
+    def _recount(self):
+        # post-order pass that fills in every subtree size
+        stack = [(self.root, False)]
+        while stack:
+            x, done = stack.pop()
+            if x.leaf:
+                x.size = x.k
+            elif done:
+                self._resize(x)
+            else:
+                stack.append((x, True))
+                stack.extend((c, False) for c in x.children)
+
+    def _resize(self, x: Node):
+        if x.leaf:
+            x.size = x.k
+        else:
+            x.size = x.k + sum(c.size for c in x.children)
+
     def search_node(self, node, key):
-        i = 0
-        k = node.k
-        while i < k and key > node.keys[i]:
-            i += 1
-        
-        if i < k and key == node.keys[i]:
-            return (node, i)
-        
-        if node.leaf:
-            return None
-        
-        return self.search_node(node.children[i], key)
+        while True:
+            i = bisect_left(node.keys, key)
+
+            if i < node.k and key == node.keys[i]:
+                return (node, i)
+
+            if node.leaf:
+                return None
+
+            node = node.children[i]
 
     def search(self, key):
         return self.search_node(self.root, key)
 
     def split_child(self, x: Node, i: int): # x is the parent i is the child index to split on
-        t = self.t
+        # -1 because 0 count 0, 1, 2, 3, 4 is 5 keys if t = 3 grab idx 2
+        self._split_at(x, i, self.t - 1)
+
+    def _split_at(self, x: Node, i: int, mid: int):
+        # split child i of x around its key at index mid, which moves up into x
         y = x.children[i] # this is a node
-        mid_key = y.keys[t-1] # -1 because 0 count 0, 1, 2, 3, 4 is 5 keys if t = 3 grab idx 2
-        z = Node(is_leaf=y.leaf) # because y and z are siblings
-        z.keys = y.keys[t:]
-        y.keys = y.keys[:t-1]
+        mid_key = y.keys[mid]
+        z = self._new_node(is_leaf=y.leaf) # because y and z are siblings
+        z.keys = y.keys[mid+1:]
+        y.keys = y.keys[:mid]
         # move the children
         if not y.leaf:
-            z.children = y.children[t:]
-            y.children = y.children[:t] # up to t because the middle one isn't removed
+            z.children = y.children[mid+1:]
+            y.children = y.children[:mid+1] # up to mid + 1 because the middle one isn't removed
         x.children.insert(i + 1, z)
         x.keys.insert(i, mid_key)
+        if self.counted:
+            self._resize(z)
+            y.size -= z.size + 1
 
     def _insert_nonfull(self, x: Node, key: int):
-        if x.leaf:
-            i = x.k - 1 # last index
-            x.keys.append(None) # make room for loop
-            while i >= 0 and key < x.keys[i]:
-                x.keys[i+1] = x.keys[i]
-                i -= 1
-            x.keys[i+1] = key
-            return
-        else:
-            i = x.k - 1 # the last key index
-            
-            while i >= 0 and key < x.keys[i]:
-                i -= 1
-            i += 1 # child index
+        full = 2 * self.t - 1
+        while True:
+            if self.counted:
+                x.size += 1 # the key always lands somewhere below x
+            if x.leaf:
+                # bisect_right keeps equal keys in insertion order
+                x.keys.insert(bisect_right(x.keys, key), key)
+                return
+
+            i = bisect_right(x.keys, key) # child index
 
-            if x.children[i].k == 2 * self.t - 1:
+            if x.children[i].k == full:
                 self.split_child(x, i)
-                
+
                 # after split decide to go left or right of the new key
                 if key > x.keys[i]:
                     i += 1
 
-            self._insert_nonfull(x.children[i], key)
+            x = x.children[i]
         
     def insert(self, key: int):
         r = self.root
         if r.k == 2 * self.t - 1:
-            s = Node(is_leaf=False)
+            s = self._new_node(is_leaf=False)
             s.children.append(r)
+            s.size = r.size
             self.root = s
             self.split_child(s, 0)
             self._insert_nonfull(s, key)
         else:
             self._insert_nonfull(r, key)
 
-    def _traverse_node(self, x: Node, out: list):
-        # print(x.keys)
+    def insert_many(self, keys):
+        """Insert a batch of keys in one top-down pass.
+
+        The batch is sorted and cut into one run per child at every node,
+        so each node is visited once per batch however many keys land
+        below it. Instead of splitting ahead of time, nodes that overflow
+        are cut into as many pieces as needed on the way back up.
+        """
+        batch = sorted(keys)
+        if not batch:
+            return
+        pieces, seps = self._insert_batch(self.root, batch)
+        while len(pieces) > 1:
+            # the root itself overflowed, grow the tree by a level
+            root = self._new_node(is_leaf=False)
+            root.children.extend(pieces)
+            root.keys.extend(seps)
+            if self.counted:
+                self._resize(root)
+            pieces, seps = self._split_overfull(root)
+        self.root = pieces[0]
+
+    def _insert_batch(self, x: Node, batch):
         if x.leaf:
-            out.extend(x.keys)
-        else:
-            for i, key in enumerate(x.keys):
-                self._traverse_node(x.children[i], out)
-                out.append(key)
-            self._traverse_node(x.children[x.k], out)
+            # both inputs are sorted runs, which timsort merges in linear
+            # time; it is stable, so equal keys keep insertion order
+            merged = x.keys[:0]
+            merged.extend(sorted(chain(x.keys, batch)))
+            x.keys = merged
+            if self.counted:
+                x.size = x.k
+            return self._split_overfull(x)
+
+        # child j takes keys[j-1] <= key < keys[j], the same routing as insert
+        runs = []
+        i, n = 0, len(batch)
+        while i < n:
+            j = bisect_right(x.keys, batch[i])
+            end = n if j == x.k else bisect_left(batch, x.keys[j], i)
+            runs.append((j, i, end))
+            i = end
+        # right to left so splicing pieces in keeps lower indices valid
+        for j, lo, hi in reversed(runs):
+            pieces, seps = self._insert_batch(x.children[j], batch[lo:hi])
+            for m in range(1, len(pieces)):
+                x.children.insert(j + m, pieces[m])
+                x.keys.insert(j + m - 1, seps[m - 1])
+        if self.counted:
+            self._resize(x)
+        return self._split_overfull(x)
+
+    def _split_overfull(self, x: Node):
+        # cut x into the fewest nodes of at most 2t - 1 keys; the first
+        # piece reuses x. Returns the pieces and the separators between them
+        t = self.t
+        total = x.k
+        if total <= 2 * t - 1:
+            return [x], []
+        count = -(-(total + 1) // (2 * t)) # ceil
+        per, extra = divmod(total - (count - 1), count)
+
+        keys = x.keys
+        children = x.children
+        parts = []
+        seps = []
+        start = 0
+        for j in range(count):
+            end = start + per + (1 if j < extra else 0)
+            part_children = None if x.leaf else children[start:end + 1]
+            parts.append((keys[start:end], part_children))
+            if j < count - 1:
+                seps.append(keys[end])
+            start = end + 1
+
+        pieces = []
+        for j, (part_keys, part_children) in enumerate(parts):
+            node = x if j == 0 else self._new_node(is_leaf=x.leaf)
+            node.keys = part_keys
+            if part_children is not None:
+                node.children = part_children
+            if self.counted:
+                self._resize(node)
+            pieces.append(node)
+        return pieces, seps
+
+    def delete_many(self, keys):
+        """Delete a batch of keys, one occurrence per listed key.
+
+        Each pass routes the sorted distinct keys down the tree, removes
+        them from the leaves and repairs underfull children on the way
+        back up by merging with a neighbour and re-splitting evenly, so
+        every node is visited once per pass. Keys found in internal nodes
+        are left for a regular delete() after the pass; they are roughly
+        one key in t. Repeated keys in the batch take one extra pass per
+        repeat.
+        """
+        batch = sorted(keys)
+        while batch:
+            distinct, rest = [], []
+            for key in batch:
+                if distinct and distinct[-1] == key:
+                    rest.append(key)
+                else:
+                    distinct.append(key)
+
+            deferred = []
+            self._delete_batch(self.root, distinct, deferred)
+            self._collapse_root()
+            for key in deferred:
+                self.delete(key)
+            batch = rest
+
+    def _delete_batch(self, x: Node, batch, deferred):
+        # on return the subtree under x is a valid B-tree except that x
+        # may be short of t - 1 keys; an internal x left with no keys has
+        # a single child that can be short too. The caller fixes both
+        if x.leaf:
+            # back to front so earlier positions stay put
+            for key in reversed(batch):
+                i = bisect_left(x.keys, key)
+                if i < x.k and x.keys[i] == key:
+                    x.keys.pop(i)
+            if self.counted:
+                x.size = x.k
+            return
+
+        # child j takes keys[j-1] < key < keys[j]; a key equal to keys[j]
+        # was found here and is deferred
+        runs = []
+        i, n = 0, len(batch)
+        while i < n:
+            j = bisect_left(x.keys, batch[i])
+            if j < x.k and x.keys[j] == batch[i]:
+                deferred.append(batch[i])
+                i += 1
+                continue
+            end = n if j == x.k else bisect_left(batch, x.keys[j], i)
+            runs.append((j, i, end))
+            i = end
+        for j, lo, hi in reversed(runs):
+            self._delete_batch(x.children[j], batch[lo:hi], deferred)
+        self._fix_children(x)
+        if self.counted:
+            self._resize(x)
+
+    def _fix_children(self, x: Node):
+        i = 0
+        while i < len(x.children):
+            if x.children[i].k < self.t - 1:
+                i = self._fix_child(x, i)
+            i += 1
+
+    def _fix_child(self, x: Node, i: int) -> int:
+        # merge the short child with a neighbour and split the result
+        # evenly if it is too big; returns where the repaired child ended up
+        t = self.t
+        while x.children[i].k < t - 1 and len(x.children) > 1:
+            p = i - 1 if i > 0 else i
+            self._merge_children(x, p)
+            merged = x.children[p]
+            if merged.k > 2 * t - 1:
+                self._split_at(x, p, merged.k // 2)
+                repaired = (x.children[p], x.children[p + 1])
+            else:
+                repaired = (merged,)
+            # only the children that met at the seam can be short
+            for node in repaired:
+                if not node.leaf:
+                    self._fix_children(node)
+            i = p
+        return i
+
+    def _collapse_root(self):
+        while self.root.k == 0 and not self.root.leaf:
+            self.root = self.root.children[0]
+
+    def _traverse_node(self, x: Node, out: list):
+        # one (keys, children) iterator pair per internal node on the path;
+        # each key is emitted between the child before it and the one after
+        extend, append = out.extend, out.append
+        done = object()
+        stack = []
+        node = x
+        while True:
+            while not node.leaf:
+                children = iter(node.children)
+                stack.append((iter(node.keys), children))
+                node = next(children)
+            extend(node.keys)
+            while stack:
+                keys, children = stack[-1]
+                key = next(keys, done)
+                if key is done:
+                    stack.pop()
+                    continue
+                append(key)
+                node = next(children)
+                break
+            else:
+                return
 
     def inorder_keys(self):
         out = []
         self._traverse_node(self.root, out)
         return out
 
+    def __iter__(self):
+        return self._iter_forward(None, inclusive=True)
+
+    def __reversed__(self):
+        return self._iter_backward(None, inclusive=True)
+
+    def iter_from(self, key=None, reverse=False):
+        """Lazily yield keys >= key in order, or keys <= key if reverse.
+
+        The tree must not be modified while the iterator is in use.
+        """
+        if reverse:
+            return self._iter_backward(key, inclusive=True)
+        return self._iter_forward(key, inclusive=True)
+
+    def range(self, lo=None, hi=None, reverse=False):
+        """Lazily yield keys with lo <= key < hi; None leaves a side open."""
+        if reverse:
+            keys = self._iter_backward(hi, inclusive=False)
+            if lo is None:
+                return keys
+            return _takewhile_ge(keys, lo)
+        keys = self._iter_forward(lo, inclusive=True)
+        if hi is None:
+            return keys
+        return _takewhile_lt(keys, hi)
+
+    def _iter_forward(self, key, inclusive):
+        # stack frames are (node, i): child i is finished, keys[i] is next
+        stack = []
+        x = self.root
+        while True:
+            if key is None:
+                i = 0
+            elif inclusive:
+                i = bisect_left(x.keys, key)
+            else:
+                i = bisect_right(x.keys, key)
+            stack.append((x, i))
+            if x.leaf:
+                break
+            x = x.children[i]
+
+        while stack:
+            x, i = stack.pop()
+            if x.leaf:
+                for j in range(i, x.k):
+                    yield x.keys[j]
+                continue
+            if i < x.k:
+                yield x.keys[i]
+                stack.append((x, i + 1))
+                # walk down to the leftmost leaf of the next child
+                x = x.children[i + 1]
+                while True:
+                    stack.append((x, 0))
+                    if x.leaf:
+                        break
+                    x = x.children[0]
+
+    def _iter_backward(self, key, inclusive):
+        # stack frames are (node, i): child i is finished, keys[i-1] is next
+        stack = []
+        x = self.root
+        while True:
+            if key is None:
+                i = x.k
+            elif inclusive:
+                i = bisect_right(x.keys, key)
+            else:
+                i = bisect_left(x.keys, key)
+            stack.append((x, i))
+            if x.leaf:
+                break
+            x = x.children[i]
+
+        while stack:
+            x, i = stack.pop()
+            if x.leaf:
+                for j in range(i - 1, -1, -1):
+                    yield x.keys[j]
+                continue
+            if i > 0:
+                yield x.keys[i - 1]
+                stack.append((x, i - 1))
+                # walk down to the rightmost leaf of the previous child
+                x = x.children[i - 1]
+                while True:
+                    stack.append((x, x.k))
+                    if x.leaf:
+                        break
+                    x = x.children[x.k]
+
+    def _require_counts(self):
+        if not self.counted:
+            raise ValueError("order statistics need a tree built with counted=True")
+
+    def rank(self, key) -> int:
+        """Number of keys strictly less than key, in O(t log n)."""
+        self._require_counts()
+        r = 0
+        x = self.root
+        while True:
+            i = bisect_left(x.keys, key)
+            r += i
+            if x.leaf:
+                return r
+            for j in range(i):
+                r += x.children[j].size
+            x = x.children[i]
+
+    def select(self, k: int):
+        """The k-th smallest key, counting from 0, in O(t log n)."""
+        self._require_counts()
+        if not 0 <= k < self.root.size:
+            raise IndexError("select index out of range")
+        x = self.root
+        while not x.leaf:
+            for j, child in enumerate(x.children):
+                if k < child.size:
+                    x = child
+                    break
+                k -= child.size
+                if k == 0:
+                    return x.keys[j]
+                k -= 1
+        return x.keys[k]
+
+    def count_range(self, lo=None, hi=None) -> int:
+        """Number of keys with lo <= key < hi, matching range()."""
+        self._require_counts()
+        below_hi = self.root.size if hi is None else self.rank(hi)
+        below_lo = 0 if lo is None else self.rank(lo)
+        return max(0, below_hi - below_lo)
+
     def delete(self, key):
         if self.root.k == 0:
             return # nothing to delete
         
         self._delete_from_node(self.root, key)
-
-        if self.root.k == 0 and not self.root.leaf:
-            self.root = self.root.children[0]
+        self._collapse_root()
     
-    def _delete_from_node(self, x: Node, key: int):
-        i = 0
-        while i < x.k and key > x.keys[i]:
-            i += 1
-        
-        if i < x.k and x.keys[i] == key:
+    def _delete_from_node(self, x: Node, key: int) -> bool:
+        # returns whether a key was removed so subtree sizes can follow
+        path = []
+        while True:
+            path.append(x)
+            i = bisect_left(x.keys, key)
+
+            if i < x.k and x.keys[i] == key:
+                if x.leaf:
+                    x.keys.pop(i)
+                    break
+                # the internal case hands back where to carry on deleting
+                x, key = self._delete_from_internal(x, i)
+                continue
             if x.leaf:
-                x.keys.pop(i)
-            else:
-                self._delete_from_internal(x, i)
-            return
-        if x.leaf:
-            return
-        
-        child_index = i
-        
-        if x.children[child_index].k == self.t -1:
-            self._fill_child(x, child_index)
-            # After _fill_child, structure may have changed.
-            # If we merged child with its left sibling, our target might shift:
-            if child_index > x.k:
-                child_index -= 1
-        self._delete_from_node(x.children[child_index], key)
+                return False
+
+            child_index = i
+
+            if x.children[child_index].k == self.t -1:
+                self._fill_child(x, child_index)
+                # After _fill_child, structure may have changed.
+                # If we merged child with its left sibling, our target might shift:
+                if child_index > x.k:
+                    child_index -= 1
+            x = x.children[child_index]
+
+        if self.counted:
+            for node in path:
+                node.size -= 1
+        return True
 
     def _delete_from_internal(self, x: Node, idx: int):
+        # returns the (child, key) the delete continues with
         key = x.keys[idx]
         left = x.children[idx]
         right = x.children[idx+1]
@@ -144,18 +683,16 @@ class BTree:
         if left.k >= self.t:
             pred = self._get_predecessor(x, idx)
             x.keys[idx] = pred
-            self._delete_from_node(left, pred)
-            return
+            return left, pred
         
         if right.k >= self.t:
             succ = self._get_successor(x, idx)
             x.keys[idx] = succ
-            self._delete_from_node(right, succ)
-            return
+            return right, succ
         
         # both children have only t-1 keys
         self._merge_children(x, idx)
-        self._delete_from_node(left, key)
+        return left, key
 
     def _fill_child(self, x: Node, idx: int):
         # ensure child x.children[idx] has at least t keys before descending
@@ -195,6 +732,11 @@ class BTree:
         
         x.keys[idx-1] = sibling.keys.pop()
 
+        if self.counted:
+            moved = 1 if child.leaf else 1 + child.children[0].size
+            child.size += moved
+            sibling.size -= moved
+
     def _borrow_from_next(self, x: Node, idx: int):
         child = x.children[idx]
         sibling = x.children[idx+1]
@@ -206,6 +748,11 @@ class BTree:
         
         x.keys[idx] = sibling.keys.pop(0)
 
+        if self.counted:
+            moved = 1 if child.leaf else 1 + child.children[child.k].size
+            child.size += moved
+            sibling.size -= moved
+
     def _merge_children(self, x: Node, idx: int):
         child = x.children[idx] # the left child
         sibling = x.children[idx+1] # the right child
@@ -221,31 +768,35 @@ class BTree:
         x.keys.pop(idx) # remove key from parent
         x.children.pop(idx + 1) # pop sibling
 
+        if self.counted:
+            child.size += 1 + sibling.size
+
 
 
-# bt = BTree(3)
+if __name__ == "__main__":
+    # bt = BTree(3)
 
-# for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 765, 2]:
-#     bt.insert(k)
+    # for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 765, 2]:
+    #     bt.insert(k)
 
-# print("root:", bt.root.keys)
-# for i, child in enumerate(bt.root.children):
-#     print(f"child {i}:", child.keys)
+    # print("root:", bt.root.keys)
+    # for i, child in enumerate(bt.root.children):
+    #     print(f"child {i}:", child.keys)
 
-# print(bt.inorder_keys())
-# bt.delete(765)
+    # print(bt.inorder_keys())
+    # bt.delete(765)
 
-# for i, child in enumerate(bt.root.children):
-#     print(f"child {i}:", child.keys)
+    # for i, child in enumerate(bt.root.children):
+    #     print(f"child {i}:", child.keys)
 
-# node = bt.root
-# print(bt._get_predecessor(node, 0))  # depending on your root layout
-# print(bt._get_successor(node, 0))
+    # node = bt.root
+    # print(bt._get_predecessor(node, 0))  # depending on your root layout
+    # print(bt._get_successor(node, 0))
 
-bt = BTree(3)
-for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 5, 42, 765, 34, 2, 4, 1]:
-    bt.insert(k)
+    bt = BTree(3)
+    for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 5, 42, 765, 34, 2, 4, 1]:
+        bt.insert(k)
 
-for k in [765, 90, 80, 70, 60, 50, 40, 30, 20, 10, 5, 42, 34, 2, 4, 1]:
-    bt.delete(k)
-    print(bt.inorder_keys())
\ No newline at end of file
+    for k in [765, 90, 80, 70, 60, 50, 40, 30, 20, 10, 5, 42, 34, 2, 4, 1]:
+        bt.delete(k)
+        print(bt.inorder_keys())
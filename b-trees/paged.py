@@ -0,0 +1,441 @@
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from main import BTree, Node, external_sort
+
+MAGIC = b"BTPG"
+VERSION = 1
+# magic, version, t, page_size, root page, page count, free list head
+HEADER = struct.Struct("<4sHHIqqq")
+# leaf flag, key count; keys and child page ids follow
+NODE_HEADER = struct.Struct("<BxHxxxx")
+FREE_LINK = struct.Struct("<q")
+NO_PAGE = -1
+
+
+def page_size_for(t):
+    # header + (2t - 1) int64 keys + 2t int64 child ids
+    return NODE_HEADER.size + 8 * (2 * t - 1) + 8 * (2 * t)
+
+
+class PageChildren:
+    """List-like view of a node's children stored as page ids.
+
+    Indexing loads the child through the pager, so the BTree code can keep
+    writing x.children[i]. Slices and pop() hand back raw page ids, and
+    insert/append/extend accept either nodes or ids, which is all that
+    split_child and the borrow/merge helpers need to move children around
+    without reading them in.
+    """
+    __slots__ = ("ids", "pager", "node")
+
+    def __init__(self, pager, node):
+        self.ids = array("q")
+        self.pager = pager
+        self.node = node
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.ids[i]
+        return self.pager.get(self.ids[i])
+
+    def __iter__(self):
+        for pid in self.ids:
+            yield self.pager.get(pid)
+
+    def insert(self, i, child):
+        self.pager.mark_dirty(self.node)
+        self.ids.insert(i, _pid(child))
+
+    def append(self, child):
+        self.pager.mark_dirty(self.node)
+        self.ids.append(_pid(child))
+
+    def extend(self, children):
+        self.pager.mark_dirty(self.node)
+        if isinstance(children, PageChildren):
+            self.ids.extend(children.ids)
+        else:
+            self.ids.extend(_pid(c) for c in children)
+
+    def pop(self, i=-1):
+        self.pager.mark_dirty(self.node)
+        return self.ids.pop(i)
+
+    def __repr__(self):
+        return f"PageChildren({list(self.ids)})"
+
+
+def _pid(child):
+    return child if isinstance(child, int) else child.pid
+
+
+class PageKeys(array):
+    """array('q') of a node's keys that marks the node's page dirty when
+    it changes, so only pages the tree code actually edits are written
+    back. Slices come back as plain arrays."""
+    __slots__ = ("node",)
+
+    def __new__(cls, node, keys=()):
+        self = super().__new__(cls, "q", keys)
+        self.node = node
+        return self
+
+    def _touch(self):
+        self.node._children.pager.mark_dirty(self.node)
+
+    def insert(self, i, key):
+        self._touch()
+        array.insert(self, i, key)
+
+    def append(self, key):
+        self._touch()
+        array.append(self, key)
+
+    def extend(self, keys):
+        self._touch()
+        array.extend(self, keys)
+
+    def pop(self, i=-1):
+        self._touch()
+        return array.pop(self, i)
+
+    def __setitem__(self, i, key):
+        self._touch()
+        array.__setitem__(self, i, key)
+
+    def __delitem__(self, i):
+        self._touch()
+        array.__delitem__(self, i)
+
+
+class PagedNode(Node):
+    __slots__ = ("pid", "_keys", "_children")
+
+    def __init__(self, is_leaf: bool, pid: int, pager, keys=()):
+        # slots are filled directly: Node.__init__ would go through the
+        # setters below and mark a page dirty just for being read
+        self.pid = pid
+        self.leaf = is_leaf
+        self.size = 0
+        self._keys = PageKeys(self, keys)
+        self._children = PageChildren(pager, self)
+
+    @property
+    def keys(self):
+        return self._keys
+
+    @keys.setter
+    def keys(self, value):
+        self._keys = PageKeys(self, value)
+        self._children.pager.mark_dirty(self)
+
+    @property
+    def children(self):
+        return self._children
+
+    @children.setter
+    def children(self, value):
+        self._children.ids = array("q", (_pid(c) for c in value))
+        self._children.pager.mark_dirty(self)
+
+
+class Pager:
+    """Fixed-size node pages in one file, read through mmap.
+
+    Page 0 holds the header. Decoded nodes are kept in an LRU cache of at
+    most cache_pages entries; a node marks its page dirty when its keys
+    or children change, and dirty pages are written back into the map
+    when they are evicted or on flush(). While a write is in progress
+    nothing is evicted, so the node objects the tree code is holding stay
+    the ones that get saved.
+    """
+
+    def __init__(self, path, t, cache_pages):
+        self.cache_pages = cache_pages
+        self.cache = OrderedDict()
+        self.dirty = set()
+        self.writing = False
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            header = self.file.read(HEADER.size)
+            magic, version, t, page_size, root, npages, free = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a paged BTree file")
+            if page_size != page_size_for(t):
+                raise ValueError(f"{path} has a corrupt header")
+        else:
+            page_size = page_size_for(t)
+            root, npages, free = NO_PAGE, 1, NO_PAGE
+            self.file.truncate(page_size * 16)
+
+        self.t = t
+        self.page_size = page_size
+        self.root_id = root
+        self.npages = npages
+        self.free_head = free
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+
+    def get(self, pid: int) -> PagedNode:
+        node = self.cache.get(pid)
+        if node is None:
+            node = self._read(pid)
+            self.cache[pid] = node
+            if not self.writing:
+                self.evict()
+        else:
+            self.cache.move_to_end(pid)
+        return node
+
+    def mark_dirty(self, node: PagedNode):
+        self.dirty.add(node.pid)
+        self.cache.setdefault(node.pid, node)
+
+    def new(self, is_leaf: bool) -> PagedNode:
+        pid = self._alloc()
+        node = PagedNode(is_leaf, pid, self)
+        self.cache[pid] = node
+        self.dirty.add(pid)
+        return node
+
+    def release(self, node: PagedNode):
+        """Write node to its page now and drop it from the cache."""
+        self._write(node)
+        self.cache.pop(node.pid, None)
+        self.dirty.discard(node.pid)
+
+    def free(self, pid: int):
+        self.cache.pop(pid, None)
+        self.dirty.discard(pid)
+        FREE_LINK.pack_into(self.mm, pid * self.page_size, self.free_head)
+        self.free_head = pid
+
+    def evict(self):
+        while len(self.cache) > self.cache_pages:
+            pid, node = self.cache.popitem(last=False)
+            if pid in self.dirty:
+                self._write(node)
+                self.dirty.discard(pid)
+
+    def flush(self):
+        for pid in self.dirty:
+            self._write(self.cache[pid])
+        self.dirty.clear()
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, self.t, self.page_size,
+                         self.root_id, self.npages, self.free_head)
+        self.mm.flush()
+
+    def close(self):
+        self.flush()
+        self.cache.clear()
+        self.mm.close()
+        self.file.close()
+
+    def _alloc(self) -> int:
+        if self.free_head != NO_PAGE:
+            pid = self.free_head
+            (self.free_head,) = FREE_LINK.unpack_from(self.mm, pid * self.page_size)
+            return pid
+        pid = self.npages
+        self.npages += 1
+        if self.npages * self.page_size > len(self.mm):
+            # grow geometrically so remapping stays rare
+            self.mm.close()
+            self.file.truncate(2 * self.npages * self.page_size)
+            self.mm = mmap.mmap(self.file.fileno(), 0)
+        return pid
+
+    def _read(self, pid: int) -> PagedNode:
+        off = pid * self.page_size
+        leaf, nkeys = NODE_HEADER.unpack_from(self.mm, off)
+        off += NODE_HEADER.size
+        node = PagedNode(bool(leaf), pid, self, self.mm[off:off + 8 * nkeys])
+        if not leaf:
+            off += 8 * (2 * self.t - 1)
+            node.children.ids.frombytes(self.mm[off:off + 8 * (nkeys + 1)])
+        return node
+
+    def _write(self, node: PagedNode):
+        off = node.pid * self.page_size
+        NODE_HEADER.pack_into(self.mm, off, node.leaf, node.k)
+        off += NODE_HEADER.size
+        keys = node.keys.tobytes()
+        self.mm[off:off + len(keys)] = keys
+        if not node.leaf:
+            off += 8 * (2 * self.t - 1)
+            ids = node.children.ids.tobytes()
+            self.mm[off:off + len(ids)] = ids
+
+
+class PagedBTree(BTree):
+    """BTree over int64 keys whose nodes live in a memory-mapped page file.
+
+    search, insert, delete and the ordered iterators are the BTree ones;
+    only node creation, the root pointer and page recycling after merges
+    are redirected to the pager. Changes reach the file on flush() or
+    close(). Opening an existing file reads just the header, nodes are
+    paged in as they are visited.
+    """
+
+    def __init__(self, path, t=128, cache_pages=4096):
+        self.pager = Pager(path, t, cache_pages)
+        self.t = self.pager.t
+        self.node_cls = PagedNode
+        self.counted = False # sizes are not part of the page format
+        if self.pager.root_id == NO_PAGE:
+            with self._write():
+                self.root = self._new_node(is_leaf=True)
+
+    @classmethod
+    def from_sorted(cls, keys, path, t=128, fill=1.0, cache_pages=4096):
+        """Bulk-load a new page file from int64 keys in non-decreasing order.
+
+        Same one-pass packing as BTree.from_sorted, but every node is
+        written to its page as soon as it is closed, so only the open
+        right spine (one node per level) is held in memory however many
+        keys go in. Pages come out in key order, leaves and the nodes
+        above them interleaved.
+        """
+        if not 0 < fill <= 1:
+            raise ValueError("fill must be in (0, 1]")
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            raise ValueError(f"{path} already holds a tree")
+        tree = cls(path, t, cache_pages)
+        tree._load_sorted(keys, fill)
+        tree.pager.evict()
+        return tree
+
+    @classmethod
+    def from_unsorted(cls, keys, path, t=128, fill=1.0, cache_pages=4096,
+                      run_size=1_000_000):
+        """Bulk-load from keys in any order, sorting them with external_sort."""
+        return cls.from_sorted(external_sort(keys, run_size), path, t, fill, cache_pages)
+
+    def _sealed(self, x: Node):
+        self.pager.release(x)
+
+    def _fix_right_spine(self):
+        with self._write():
+            super()._fix_right_spine()
+
+    @property
+    def root(self):
+        return self.pager.get(self.pager.root_id)
+
+    @root.setter
+    def root(self, node):
+        self.pager.root_id = node.pid
+
+    def _new_node(self, is_leaf: bool) -> Node:
+        return self.pager.new(is_leaf)
+
+    @contextmanager
+    def _write(self):
+        outer = self.pager.writing
+        self.pager.writing = True
+        try:
+            yield
+        finally:
+            self.pager.writing = outer
+            if not outer:
+                self.pager.evict()
+
+    def insert(self, key: int):
+        with self._write():
+            super().insert(key)
+
+    def insert_many(self, keys):
+        for chunk in self._chunks(keys):
+            with self._write():
+                super().insert_many(chunk)
+
+    def delete(self, key):
+        with self._write():
+            super().delete(key)
+
+    def delete_many(self, keys):
+        for chunk in self._chunks(keys):
+            with self._write():
+                super().delete_many(chunk)
+
+    def _chunks(self, keys):
+        # a write pins every page it fetches until it ends, so a batch goes
+        # in sorted chunks of about cache_pages / height keys, each its own
+        # write: the cache evicts between chunks and never holds much more
+        # than cache_pages plus one chunk's paths
+        batch = sorted(keys)
+        i = 0
+        while i < len(batch):
+            height = 1
+            x = self.root
+            while not x.leaf:
+                x = x.children[0]
+                height += 1
+            size = max(1, self.pager.cache_pages // height)
+            yield batch[i:i + size]
+            i += size
+
+    def _collapse_root(self):
+        while self.root.k == 0 and not self.root.leaf:
+            old_root = self.pager.root_id
+            self.root = self.root.children[0]
+            self.pager.free(old_root)
+
+    def _merge_children(self, x: Node, idx: int):
+        sibling = x.children.ids[idx + 1]
+        super()._merge_children(x, idx)
+        self.pager.free(sibling)
+
+    def flush(self):
+        self.pager.flush()
+
+    def close(self):
+        self.pager.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "tree.pages")
+    with PagedBTree(path, t=3, cache_pages=4) as bt:
+        for k in [10, 20, 30, 40, 50, 60, 70, 80, 90, 5, 42, 765, 34, 2, 4, 1]:
+            bt.insert(k)
+        print(bt.inorder_keys())
+
+    with PagedBTree(path, cache_pages=4) as bt:
+        assert bt.search(42) is not None
+        for k in [765, 90, 80, 70, 60, 50, 40, 30]:
+            bt.delete(k)
+        print(bt.inorder_keys())
+
+    with PagedBTree(path) as bt:
+        assert bt.inorder_keys() == [1, 2, 4, 5, 10, 20, 34, 42]
+
+    import random
+    for t in (2, 3, 16):
+        for n in (0, 1, 5, 300, 5000):
+            keys = random.sample(range(10 * n + 1), n)
+            path = os.path.join(tempfile.mkdtemp(), "bulk.pages")
+            with PagedBTree.from_unsorted(keys, path, t, fill=0.7, cache_pages=8, run_size=1000) as bt:
+                assert bt.inorder_keys() == sorted(keys)
+            with PagedBTree(path, cache_pages=8) as bt:
+                assert bt.inorder_keys() == sorted(keys)
+                for k in keys[::3]:
+                    bt.delete(k)
+                bt.insert(-1)
+                assert bt.inorder_keys() == sorted(set(keys) - set(keys[::3]) | {-1})
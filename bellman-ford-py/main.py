@@ -1,3 +1,11 @@
+import os
+import sys
+
+if __name__ == "__main__":
+    # run as a script; importers put csr-graph on the path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from csr import CSRGraph
+
 graph = {
     'A': [('B', 3), ('C', 5)],
     'B': [('C', 1)],
@@ -5,6 +13,8 @@ graph = {
 }
 
 def bellman_ford(G, s):
+    if isinstance(G, CSRGraph):
+        return bellman_ford_csr(G, s)
     dists = {}
     parents = {}
 
@@ -30,6 +40,35 @@ def bellman_ford(G, s):
                return False
     return dists, parents
 
+def bellman_ford_csr(G, s):
+    """Same passes over the CSR arrays. s may be a label or an id; dists and
+    parents are lists indexed by vertex id (G.label(v) maps back)."""
+    n = G.n
+    offsets, targets, weights = G.offsets, G.targets, G.weights
+    dists = [float('inf')] * n
+    parents = [None] * n
+    dists[G.vertex(s)] = 0
+
+    for _ in range(1, n):
+        changed = False
+        for u in range(n):
+            du = dists[u]
+            if du == float('inf'):
+                continue
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if dists[v] > du + weights[i]:
+                    dists[v] = du + weights[i]
+                    parents[v] = u
+                    changed = True
+        if not changed:
+            break # nothing moved, later passes would not either
+    for u in range(n):
+        for i in range(offsets[u], offsets[u + 1]):
+            if dists[targets[i]] > dists[u] + weights[i]:
+                return False
+    return dists, parents
+
 result = bellman_ford(graph, 'A')
 
 if result is False:
@@ -38,3 +77,7 @@ else:
     distances, parents = result
     print(distances)
     print(parents)
+
+    csr = CSRGraph.from_dict(graph)
+    csr_dists, _ = bellman_ford(csr, 'A')
+    assert {csr.label(v): d for v, d in enumerate(csr_dists)} == distances
@@ -0,0 +1,55 @@
+import random
+import time
+import tracemalloc
+
+from csr import CSRGraph
+
+
+def kept(fn):
+    tracemalloc.start()
+    out = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, size
+
+
+def random_edges(n, m, seed=1):
+    rnd = random.Random(seed)
+    return [(rnd.randrange(n), rnd.randrange(n), rnd.randrange(1, 1000)) for _ in range(m)]
+
+
+def bench_memory(n=100_000, m=1_000_000):
+    print(f"graph memory (n={n:,}, m={m:,})")
+    edges = random_edges(n, m)
+
+    def adjacency():
+        # fresh tuples, like a graph parsed from a file
+        adj = [[] for _ in range(n)]
+        for u, v, w in edges:
+            adj[u].append((v, w + 0))
+        return adj
+
+    def labelled():
+        graph = {f"v{u}": [] for u in range(n)}
+        for u, v, w in edges:
+            graph[f"v{u}"].append((f"v{v}", w + 0))
+        return graph
+
+    adj, adj_size = kept(adjacency)
+    graph, dict_size = kept(labelled)
+    csr, csr_size = kept(lambda: CSRGraph.from_edges(edges, n=n))
+    print(f"  list of (v, w) lists {adj_size / m:8.1f} bytes/edge")
+    print(f"  dict of labels       {dict_size / m:8.1f} bytes/edge")
+    print(f"  CSRGraph             {csr_size / m:8.1f} bytes/edge  ({csr.nbytes() / m:.1f} in the arrays)")
+
+    for name, g in (("list", adj), ("CSRGraph", csr)):
+        start = time.perf_counter()
+        total = 0
+        for u in range(n):
+            for v, w in g[u]:
+                total += w
+        print(f"  scan all edges, {name:<9} {time.perf_counter() - start:6.2f} s")
+
+
+if __name__ == "__main__":
+    bench_memory()
@@ -0,0 +1,174 @@
+"""
+Compressed sparse row (CSR) graph shared by the shortest-path folders.
+
+The out-edges of vertex u are targets[offsets[u]:offsets[u+1]] with the
+matching weights. offsets is int64, targets int32 and weights int64 (or
+float64 when any weight is a float), so an edge costs 12 bytes instead of
+a tuple in a list (~150 bytes with the ints it points at).
+
+The other folders import it as plain `from csr import CSRGraph`. Only the
+entry points (a script run as __main__, a bench.py) add the folder with
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+"""
+from array import array
+
+
+class CSRGraph:
+    """Directed weighted graph over vertex ids 0..n-1.
+
+    graph[u] yields (v, w) pairs, so code written for a list of
+    neighbour lists runs on it unchanged. When the graph was built from
+    labelled vertices, labels[id] is the label and ids[label] the id;
+    vertex() turns either into an id.
+    """
+
+    def __init__(self, offsets: array, targets: array, weights: array, labels=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.labels = labels
+        self.ids = None if labels is None else {x: i for i, x in enumerate(labels)}
+        self._reverse = None
+
+    @property
+    def n(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def m(self) -> int:
+        return len(self.targets)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, u):
+        a, b = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[a:b], self.weights[a:b])
+
+    def vertex(self, x) -> int:
+        """Id of x, which is a label on a labelled graph and an id otherwise."""
+        return x if self.ids is None else self.ids[x]
+
+    def label(self, v: int):
+        return v if self.labels is None else self.labels[v]
+
+    def edges(self):
+        """Yield (u, v, w) in id order."""
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        for u in range(self.n):
+            for i in range(offsets[u], offsets[u + 1]):
+                yield u, targets[i], weights[i]
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.weights))
+
+    @classmethod
+    def from_edges(cls, edges, n=None):
+        """Build from (u, v, w) triples. With n the endpoints are ids in
+        range(n); without it they are labels, numbered in order of first
+        appearance."""
+        labels = None
+        src = array("i")
+        dst = array("i")
+        wts = []
+        if n is None:
+            ids = {}
+            labels = []
+            for u, v, w in edges:
+                for x in (u, v):
+                    if x not in ids:
+                        ids[x] = len(labels)
+                        labels.append(x)
+                src.append(ids[u])
+                dst.append(ids[v])
+                wts.append(w)
+            n = len(labels)
+        else:
+            for u, v, w in edges:
+                src.append(u)
+                dst.append(v)
+                wts.append(w)
+        return cls._from_arrays(n, src, dst, wts, labels)
+
+    @classmethod
+    def from_adjacency(cls, adj):
+        """Build from the list-of-(v, w)-lists format in dijktras/main.py."""
+        return cls.from_edges(((u, v, w) for u, nbrs in enumerate(adj) for v, w in nbrs), n=len(adj))
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Build from {label: [(label, w), ...]} as used by bellman-ford-py,
+        dag-short-path and johnsons. Keys come first in the label order, so
+        vertices without out-edges keep their place."""
+        labels = list(graph)
+        ids = {x: i for i, x in enumerate(labels)}
+        src = array("i")
+        dst = array("i")
+        wts = []
+        for u, nbrs in graph.items():
+            for v, w in nbrs:
+                if v not in ids:
+                    ids[v] = len(labels)
+                    labels.append(v)
+                src.append(ids[u])
+                dst.append(ids[v])
+                wts.append(w)
+        return cls._from_arrays(len(labels), src, dst, wts, labels)
+
+    @classmethod
+    def _from_arrays(cls, n, src, dst, wts, labels):
+        # counting sort of the edges by source, stable within a source
+        offsets = array("q", bytes(8 * (n + 1)))
+        for u in src:
+            offsets[u + 1] += 1
+        for u in range(n):
+            offsets[u + 1] += offsets[u]
+
+        typecode = "q" if all(type(w) is int for w in wts) else "d"
+        targets = array("i", bytes(4 * len(dst)))
+        weights = array(typecode, bytes(8 * len(wts)))
+        fill = offsets[:-1]
+        for u, v, w in zip(src, dst, wts):
+            i = fill[u]
+            targets[i] = v
+            weights[i] = w
+            fill[u] = i + 1
+        return cls(offsets, targets, weights, labels)
+
+    def reverse(self) -> "CSRGraph":
+        """Graph with every edge flipped, built on first use and cached
+        (the reverse of the reverse is this graph again)."""
+        if self._reverse is None:
+            src = array("i")
+            for u in range(self.n):
+                src.extend([u] * (self.offsets[u + 1] - self.offsets[u]))
+            r = CSRGraph._from_arrays(self.n, self.targets, src, self.weights, None)
+            r.labels, r.ids = self.labels, self.ids
+            r._reverse = self
+            self._reverse = r
+        return self._reverse
+
+    def with_weights(self, weights: array) -> "CSRGraph":
+        """Same structure with new weights; the offsets and targets arrays
+        are shared, not copied."""
+        g = CSRGraph(self.offsets, self.targets, weights)
+        g.labels, g.ids = self.labels, self.ids
+        return g
+
+
+if __name__ == "__main__":
+    g = CSRGraph.from_dict({
+        'A': [('B', 3), ('C', 5)],
+        'B': [('C', 1)],
+        'C': [],
+    })
+    assert list(g[g.vertex('A')]) == [(1, 3), (2, 5)]
+    assert list(g.reverse()[g.vertex('C')]) == [(0, 5), (1, 1)]
+    assert g.reverse() is g.reverse() and g.reverse().reverse() is g
+    assert [(g.label(u), g.label(v), w) for u, v, w in g.edges()] == [('A', 'B', 3), ('A', 'C', 5), ('B', 'C', 1)]
+
+    adj = [[(1, 1), (2, 4)], [(2, 2), (3, 5)], [(3, 1)], []]
+    h = CSRGraph.from_adjacency(adj)
+    assert [list(h[u]) for u in range(len(h))] == adj
+    print(h.n, h.m, h.nbytes(), "bytes")
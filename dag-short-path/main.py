@@ -1,6 +1,15 @@
+import os
+import sys
 from collections import deque
 
+if __name__ == "__main__":
+    # run as a script; importers put csr-graph on the path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from csr import CSRGraph
+
 def topo_sort_kahn(graph):
+    if isinstance(graph, CSRGraph):
+        return topo_sort_csr(graph)
     in_degree = { u: 0 for u in graph }
     for u, nbrs in graph.items():
         for v, _w in nbrs:
@@ -25,6 +34,28 @@ def topo_sort_kahn(graph):
         return
     return order
 
+def topo_sort_csr(graph):
+    # Kahn over the arrays, vertex ids in and out
+    offsets, targets = graph.offsets, graph.targets
+    in_degree = [0] * graph.n
+    for v in targets:
+        in_degree[v] += 1
+
+    q = deque(u for u in range(graph.n) if in_degree[u] == 0)
+    order = []
+    while q:
+        u = q.popleft()
+        order.append(u)
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                q.append(v)
+    if len(order) < graph.n:
+        print("Cycle detected")
+        return
+    return order
+
 def relax(u, v, w, d, pi):
     if d[v] > d[u] + w:
         d[v] = d[u] + w
@@ -51,7 +82,29 @@ def init_longest_source(graph, s):
     pi = { u: None for u, _nbrs in graph.items() }
     return d, pi
 
+def dag_shortest_path_csr(graph, s):
+    """dag_shortest_path on a CSRGraph: s is a label or an id, d and pi are
+    lists indexed by vertex id."""
+    order = topo_sort_csr(graph)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    d = [float('inf')] * graph.n
+    pi = [None] * graph.n
+    d[graph.vertex(s)] = 0
+
+    for u in order:
+        du = d[u]
+        if du == float('inf'):
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if d[v] > du + weights[i]:
+                d[v] = du + weights[i]
+                pi[v] = u
+    return d, pi, order
+
 def dag_shortest_path(graph, s):
+    if isinstance(graph, CSRGraph):
+        return dag_shortest_path_csr(graph, s)
     order = topo_sort_kahn(graph)
     d, pi = init_single_source(graph, s)
 
@@ -80,7 +133,7 @@ def reconstruct_path(pi, s, t):
         path.append(cur)
         if cur == s:
             break
-        cur = pi.get(cur) # get the parent of current node
+        cur = pi[cur] if isinstance(pi, list) else pi.get(cur) # get the parent of current node
     if not path or path[-1] != s:
         return None
     path.reverse()
@@ -100,6 +153,12 @@ d, pi, order = dag_shortest_path(graph, 's')
 print(f"d = {d}, pi={pi}, order={order}\n")
 print(f"reconstruct: {reconstruct_path(pi, 's', 't')}\n")
 
+csr = CSRGraph.from_dict(graph)
+d_csr, pi_csr, _ = dag_shortest_path(csr, 's')
+assert {csr.label(v): x for v, x in enumerate(d_csr)} == d
+path = reconstruct_path(pi_csr, csr.vertex('s'), csr.vertex('t'))
+assert [csr.label(v) for v in path] == reconstruct_path(pi, 's', 't')
+
 print("------longest path-------\n")
 d, pi, ordeå = dag_longest_path(graph, 's')
 print(f"d = {d}, pi={pi}, order={order}\n")
@@ -0,0 +1,126 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from ch import ContractionHierarchy
+from main import (INF, CSRGraph, alt_heuristic, astar, dijkstra_bidirectional, dijkstra_book,
+                  dijkstra_lazy, euclidean_heuristic, manhattan_heuristic, pick_landmarks)
+
+
+def grid_graph(width, height, seed=1):
+    """4-neighbour grid, both directions, random weights 10..20 so the
+    cheapest routes wander a little like on a road map. Vertex y*width+x
+    sits at (x, y)."""
+    rnd = random.Random(seed)
+    edges = []
+    for y in range(height):
+        for x in range(width):
+            u = y * width + x
+            if x + 1 < width:
+                w = rnd.randint(10, 20)
+                edges += [(u, u + 1, w), (u + 1, u, w)]
+            if y + 1 < height:
+                w = rnd.randint(10, 20)
+                edges += [(u, u + width, w), (u + width, u, w)]
+    coords = [(v % width, v // width) for v in range(width * height)]
+    return CSRGraph.from_edges(edges, n=width * height), coords
+
+
+def random_pairs(n, count, seed=2):
+    rnd = random.Random(seed)
+    return [(rnd.randrange(n), rnd.randrange(n)) for _ in range(count)]
+
+
+def run_queries(name, pairs, query):
+    settled = 0
+    start = time.perf_counter()
+    for s, t in pairs:
+        stats = {}
+        query(s, t, stats)
+        settled += stats["settled"]
+    secs = time.perf_counter() - start
+    print(f"  {name:<16} {settled / len(pairs):10,.0f} settled/query"
+          f"  {secs / len(pairs) * 1e3:8.2f} ms/query")
+
+
+def bench_bidirectional(width=300, height=300, queries=50):
+    graph, _ = grid_graph(width, height)
+    pairs = random_pairs(graph.n, queries)
+    print(f"point-to-point on a {width}x{height} grid ({queries} queries)")
+    for s, t in pairs[:10]:
+        d, _ = dijkstra_bidirectional(graph, graph.reverse(), s, t)
+        assert d == dijkstra_lazy(graph, s, t)[0][t]
+    run_queries("dijkstra_lazy", pairs, lambda s, t, st: dijkstra_lazy(graph, s, t, stats=st))
+    rgraph = graph.reverse()
+    run_queries("bidirectional", pairs,
+                lambda s, t, st: dijkstra_bidirectional(graph, rgraph, s, t, stats=st))
+
+
+def bench_astar(width=300, height=300, queries=50, landmarks=8):
+    graph, coords = grid_graph(width, height)
+    pairs = random_pairs(graph.n, queries)
+    print(f"A* on a {width}x{height} grid ({queries} queries)")
+    start = time.perf_counter()
+    alt = alt_heuristic(graph, pick_landmarks(graph, landmarks))
+    print(f"  ALT preprocessing, {landmarks} landmarks: {time.perf_counter() - start:.1f} s")
+
+    heuristics = [
+        ("euclidean", euclidean_heuristic(coords, min_cost=10)),
+        ("manhattan", manhattan_heuristic(coords, min_cost=10)),
+        (f"ALT x{landmarks}", alt),
+    ]
+    for s, t in pairs[:10]:
+        d = dijkstra_lazy(graph, s, t)[0][t]
+        assert all(astar(graph, s, t, h)[0][t] == d for _, h in heuristics)
+
+    run_queries("dijkstra_lazy", pairs, lambda s, t, st: dijkstra_lazy(graph, s, t, stats=st))
+    for name, h in heuristics:
+        run_queries(f"astar {name}", pairs, lambda s, t, st: astar(graph, s, t, h, stats=st))
+
+
+def bench_ch(width=100, height=100, queries=200):
+    graph, _ = grid_graph(width, height)
+    pairs = random_pairs(graph.n, queries)
+    print(f"contraction hierarchy on a {width}x{height} grid ({queries} queries)")
+    start = time.perf_counter()
+    ch = ContractionHierarchy.build(graph)
+    print(f"  build {time.perf_counter() - start:.1f} s, {ch.up.m + ch.down.m:,} edges"
+          f" for {graph.m:,} in the graph")
+    path = os.path.join(tempfile.mkdtemp(), "grid.ch")
+    ch.save(path)
+    start = time.perf_counter()
+    ch = ContractionHierarchy.load(path)
+    print(f"  load {(time.perf_counter() - start) * 1e3:.1f} ms, {os.path.getsize(path):,} bytes")
+    for s, t in pairs[:20]:
+        assert ch.distance(s, t) == dijkstra_lazy(graph, s, t)[0][t]
+
+    run_queries("dijkstra_lazy", pairs, lambda s, t, st: dijkstra_lazy(graph, s, t, stats=st))
+    rgraph = graph.reverse()
+    run_queries("bidirectional", pairs,
+                lambda s, t, st: dijkstra_bidirectional(graph, rgraph, s, t, stats=st))
+    run_queries("CH", pairs, lambda s, t, st: ch.distance(s, t, stats=st))
+
+
+def bench_book(width=300, height=300, sources=5):
+    graph, _ = grid_graph(width, height)
+    print(f"dijkstra_book, full runs on a {width}x{height} grid ({sources} sources)")
+    starts = [s for s, _ in random_pairs(graph.n, sources)]
+    expected = dijkstra_lazy(graph, starts[0])[0]
+    for d in (2, 4, 8):
+        assert dijkstra_book(graph, starts[0], d=d)[0] == expected
+        secs = INF
+        for s in starts:
+            start = time.perf_counter()
+            dijkstra_book(graph, s, d=d)
+            secs = min(secs, time.perf_counter() - start) # best run, this box is noisy
+        print(f"  d={d}  {secs * 1e3:8.1f} ms/run  {graph.n / secs:12,.0f} vertices/s")
+
+
+if __name__ == "__main__":
+    bench_bidirectional()
+    bench_astar()
+    bench_ch()
+    bench_book()
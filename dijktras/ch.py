@@ -0,0 +1,351 @@
+"""
+Contraction hierarchies: preprocess once, then answer s-t queries with two
+small upward searches.
+
+Vertices are contracted one at a time, least important first. Contracting
+v removes it from the graph, and for every pair u -> v -> x that was the only
+shortest u-x route a shortcut edge u -> x of the same length is added. The
+order of contraction is the rank. A shortest path then always climbs to
+its highest-ranked vertex and comes back down, so the query searches
+upward from s in the forward graph and upward from t in the reversed graph
+and meets in the middle.
+"""
+import heapq
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == "__main__":
+    # run as a script; importers put csr-graph on the path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from main import INF, CSRGraph, assert_non_negative
+
+CH_MAGIC = b"CHGR"
+CH_VERSION = 1
+CH_HEADER = struct.Struct("<4sHqqqc")
+
+MAX_SETTLED = 100 # per witness search; a cut-off search only means an extra shortcut
+
+
+def _adjacency(graph):
+    # mutable copy of the graph as dicts, parallel edges folded to the cheapest
+    out_e = [{} for _ in range(len(graph))]
+    in_e = [{} for _ in range(len(graph))]
+    for u in range(len(graph)):
+        for v, w in graph[u]:
+            if u != v and w < out_e[u].get(v, INF):
+                out_e[u][v] = w
+                in_e[v][u] = w
+    return out_e, in_e
+
+
+def _witness(out_e, src, skip, limit, max_settled):
+    # distances from src in the remaining graph without skip, up to limit
+    dist = {src: 0}
+    pq = [(0, src)]
+    settled = 0
+    while pq and settled < max_settled:
+        d, u = heapq.heappop(pq)
+        if d != dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for v, w in out_e[u].items():
+            if v != skip and d + w < dist.get(v, INF):
+                dist[v] = d + w
+                heapq.heappush(pq, (d + w, v))
+    return dist
+
+
+def _shortcuts(out_e, in_e, v, max_settled):
+    """Shortcuts (u, x, w) that contracting v would need right now."""
+    outs = out_e[v]
+    if not outs:
+        return []
+    max_out = max(outs.values())
+    found = []
+    for u, wu in in_e[v].items():
+        dist = _witness(out_e, u, v, wu + max_out, max_settled)
+        for x, wx in outs.items():
+            if x != u and dist.get(x, INF) > wu + wx:
+                found.append((u, x, wu + wx))
+    return found
+
+
+def _priority(out_e, in_e, v, deleted, max_settled):
+    # edge difference, plus contracted neighbours so the order spreads out
+    shortcuts = _shortcuts(out_e, in_e, v, max_settled)
+    return len(shortcuts) - len(out_e[v]) - len(in_e[v]) + deleted[v], shortcuts
+
+
+_worker_graph = None
+
+
+def _init_worker(offsets, targets, weights, max_settled):
+    global _worker_graph
+    out_e, in_e = _adjacency(CSRGraph(offsets, targets, weights))
+    _worker_graph = out_e, in_e, max_settled
+
+
+def _initial_priorities(vertices):
+    out_e, in_e, max_settled = _worker_graph
+    deleted = [0] * len(out_e)
+    return [_priority(out_e, in_e, v, deleted, max_settled)[0] for v in vertices]
+
+
+def _upward_csr(n, edges, typecode):
+    # (u, v, w, middle) tuples -> CSRGraph plus the middle vertex of each
+    # edge (-1 for an original edge), in the same order as the targets
+    edges.sort(key=lambda e: e[0])
+    offsets = array("q", bytes(8 * (n + 1)))
+    for u, _, _, _ in edges:
+        offsets[u + 1] += 1
+    for u in range(n):
+        offsets[u + 1] += offsets[u]
+    targets = array("i", (e[1] for e in edges))
+    weights = array(typecode, (e[2] for e in edges))
+    middle = array("i", (e[3] for e in edges))
+    return CSRGraph(offsets, targets, weights), middle
+
+
+class ContractionHierarchy:
+    """Shortest-path index over a graph with non-negative weights.
+
+    up holds the edges (original and shortcut) from each vertex to
+    higher-ranked ones; down holds, at each vertex v, the edges u -> v
+    from higher-ranked u, so both query searches only ever go up. up_mid
+    and down_mid give the vertex a shortcut skips over, which is how
+    path() expands shortcuts back into original edges.
+    """
+
+    def __init__(self, rank, up, up_mid, down, down_mid):
+        self.rank = rank
+        self.up = up
+        self.up_mid = up_mid
+        self.down = down
+        self.down_mid = down_mid
+
+    def __len__(self):
+        return len(self.rank)
+
+    @classmethod
+    def build(cls, graph, workers=1, max_settled=MAX_SETTLED):
+        """Contract every vertex of graph (a CSRGraph or a list of (v, w)
+        lists) and return the hierarchy.
+
+        The order is a lazy priority queue on the edge difference: the
+        popped vertex is re-scored, and contracted only if it still beats
+        the next one in the queue. With workers > 1 the initial scores,
+        one witness search per in-edge of every vertex, are spread over a
+        process pool. Contraction itself is sequential, each step changes
+        the graph the next one sees.
+        """
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_adjacency(graph)
+        assert_non_negative(graph)
+        n = graph.n
+        out_e, in_e = _adjacency(graph)
+        deleted = [0] * n
+
+        if workers > 1 and n:
+            size = -(-n // (4 * workers))
+            chunks = [range(i, min(i + size, n)) for i in range(0, n, size)]
+            args = (graph.offsets, graph.targets, graph.weights, max_settled)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=args) as ex:
+                prio = [p for part in ex.map(_initial_priorities, chunks) for p in part]
+        else:
+            prio = [_priority(out_e, in_e, v, deleted, max_settled)[0] for v in range(n)]
+
+        pq = [(p, v) for v, p in enumerate(prio)]
+        heapq.heapify(pq)
+        rank = array("i", bytes(4 * n))
+        middle = {} # (u, x) -> v for the current shortcut u -> x
+        up, down = [], []
+        order = 0
+        while pq:
+            _, v = heapq.heappop(pq)
+            p, shortcuts = _priority(out_e, in_e, v, deleted, max_settled)
+            if pq and p > pq[0][0]:
+                heapq.heappush(pq, (p, v))
+                continue
+
+            rank[v] = order
+            order += 1
+            for u, x, w in shortcuts:
+                if w < out_e[u].get(x, INF):
+                    out_e[u][x] = w
+                    in_e[x][u] = w
+                    middle[u, x] = v
+            # whatever is still attached to v ranks higher
+            for x, w in out_e[v].items():
+                up.append((v, x, w, middle.get((v, x), -1)))
+                del in_e[x][v]
+            for u, w in in_e[v].items():
+                down.append((v, u, w, middle.get((u, v), -1)))
+                del out_e[u][v]
+            for x in out_e[v].keys() | in_e[v].keys():
+                deleted[x] += 1
+            out_e[v] = in_e[v] = {}
+
+        typecode = graph.weights.typecode
+        up, up_mid = _upward_csr(n, up, typecode)
+        down, down_mid = _upward_csr(n, down, typecode)
+        return cls(rank, up, up_mid, down, down_mid)
+
+    def _search(self, s, t, stats):
+        # forward search over up, backward over down, each stopping once its
+        # queue top cannot improve best. A vertex reached more cheaply from
+        # a higher-ranked one is stalled: it cannot be on a shortest upward
+        # path, so its edges are not scanned.
+        sides = [
+            ({s: 0}, {s: -1}, [(0, s)], self.up, self.down),
+            ({t: 0}, {t: -1}, [(0, t)], self.down, self.up),
+        ]
+        best, meet = INF, -1
+        settled = 0
+        while True:
+            live = [side for side in sides if side[2] and side[2][0][0] < best]
+            if not live:
+                break
+            dist, parent, pq, g, stall = min(live, key=lambda side: side[2][0][0])
+            other = sides[1][0] if dist is sides[0][0] else sides[0][0]
+            d, u = heapq.heappop(pq)
+            if d != dist[u]:
+                continue
+            settled += 1
+            if u in other and d + other[u] < best:
+                best, meet = d + other[u], u
+            if any(dist.get(x, INF) + w < d for x, w in stall[u]):
+                continue
+            for v, w in g[u]:
+                if d + w < dist.get(v, INF):
+                    dist[v] = d + w
+                    parent[v] = u
+                    heapq.heappush(pq, (d + w, v))
+        if stats is not None:
+            stats["settled"] = settled
+        return best, meet, sides[0][1], sides[1][1]
+
+    def distance(self, s, t, stats=None):
+        """Length of the shortest s-t path, INF when t is unreachable.
+        stats["settled"] counts the vertices settled on both sides."""
+        return self._search(s, t, stats)[0]
+
+    def path(self, s, t, stats=None):
+        """(distance, vertices) with every shortcut expanded back into the
+        original edges; the vertex list is empty when t is unreachable."""
+        best, meet, parent_f, parent_b = self._search(s, t, stats)
+        if meet == -1:
+            return INF, []
+        hops = []
+        v = meet
+        while v != -1:
+            hops.append(v)
+            v = parent_f[v]
+        hops.reverse()
+        v = parent_b[meet]
+        while v != -1:
+            hops.append(v)
+            v = parent_b[v]
+
+        path = [s]
+        for a, b in zip(hops, hops[1:]):
+            stack = [(a, b)]
+            while stack:
+                a, b = stack.pop()
+                m = self._middle(a, b)
+                if m == -1:
+                    path.append(b)
+                else:
+                    stack.append((m, b))
+                    stack.append((a, m))
+        return best, path
+
+    def _middle(self, a, b):
+        # the a -> b edge lives in up at a when b ranks higher, in down at b otherwise
+        if self.rank[a] < self.rank[b]:
+            g, mid, at, to = self.up, self.up_mid, a, b
+        else:
+            g, mid, at, to = self.down, self.down_mid, b, a
+        best, m = INF, -1
+        for i in range(g.offsets[at], g.offsets[at + 1]):
+            if g.targets[i] == to and g.weights[i] < best:
+                best, m = g.weights[i], mid[i]
+        return m
+
+    def save(self, path) -> None:
+        """Write the hierarchy as a header followed by the raw arrays."""
+        typecode = self.up.weights.typecode
+        with open(path, "wb") as f:
+            f.write(CH_HEADER.pack(CH_MAGIC, CH_VERSION, len(self), self.up.m, self.down.m,
+                                   typecode.encode()))
+            for a in self._arrays():
+                a.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, n, m_up, m_down, typecode = CH_HEADER.unpack(f.read(CH_HEADER.size))
+            if magic != CH_MAGIC or version != CH_VERSION:
+                raise ValueError(f"{path} is not a saved ContractionHierarchy")
+            typecode = typecode.decode()
+            arrays = []
+            for code, count in [("i", n),
+                                ("q", n + 1), ("i", m_up), (typecode, m_up), ("i", m_up),
+                                ("q", n + 1), ("i", m_down), (typecode, m_down), ("i", m_down)]:
+                a = array(code)
+                try:
+                    a.fromfile(f, count)
+                except EOFError:
+                    raise ValueError(f"{path} is truncated") from None
+                arrays.append(a)
+        rank, uo, ut, uw, um, do, dt, dw, dm = arrays
+        return cls(rank, CSRGraph(uo, ut, uw), um, CSRGraph(do, dt, dw), dm)
+
+    def _arrays(self):
+        return [self.rank,
+                self.up.offsets, self.up.targets, self.up.weights, self.up_mid,
+                self.down.offsets, self.down.targets, self.down.weights, self.down_mid]
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    from main import dijkstra_lazy
+
+    graph = [
+        [(1, 1), (2, 4)],  # 0
+        [(2, 2), (3, 5)],  # 1
+        [(3, 1)],          # 2
+        []                 # 3
+    ]
+    ch = ContractionHierarchy.build(graph)
+    assert ch.path(0, 3) == (4, [0, 1, 2, 3])
+    assert ch.distance(3, 0) == INF and ch.path(3, 0) == (INF, [])
+
+    rnd = random.Random(7)
+    n = 300
+    edges = [(rnd.randrange(n), rnd.randrange(n), rnd.randint(1, 50)) for _ in range(1200)]
+    g = CSRGraph.from_edges(edges, n=n)
+    ch = ContractionHierarchy.build(g)
+    weight = {}
+    for u, v, w in edges:
+        weight[u, v] = min(w, weight.get((u, v), INF))
+    for s in range(0, n, 7):
+        dist, _ = dijkstra_lazy(g, s)
+        for t in range(0, n, 5):
+            d, p = ch.path(s, t)
+            assert d == dist[t]
+            if p:
+                assert p[0] == s and p[-1] == t
+                assert sum(weight[a, b] for a, b in zip(p, p[1:])) == d
+
+    path = os.path.join(tempfile.mkdtemp(), "graph.ch")
+    ch.save(path)
+    loaded = ContractionHierarchy.load(path)
+    assert loaded.path(0, 42) == ch.path(0, 42)
+    print("ok,", ch.up.m + ch.down.m, "edges in the hierarchy for", g.m, "in the graph")
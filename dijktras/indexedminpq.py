@@ -1,9 +1,25 @@
+from array import array
+
+
 class IndexedMinPQ:
-    def __init__(self, keys):
+    """Min-heap of vertex ids ordered by keys[v], with O(1) lookup of where
+    each vertex sits so its key can change in place.
+
+    The heap is d-ary (d children per node, d=2 is the classic binary
+    heap): a wider heap is shallower, so decrease_key has fewer levels to
+    climb, while pop_min compares more children per level. heap and pos
+    are int32 arrays. Sifting moves a hole instead of swapping, so each
+    level costs one write to heap and one to pos.
+    """
+
+    def __init__(self, keys, d=4):
         # keys is a reference to the dist[] array
+        if d < 2:
+            raise ValueError("d must be at least 2")
         self.keys = keys
-        self.heap = []        # holds vertex ids
-        self.pos = [-1] * len(keys)  # pos[v] = index in heap, or -1 if not present
+        self.d = d
+        self.heap = array('i')               # holds vertex ids
+        self.pos = array('i', [-1]) * len(keys)  # pos[v] = index in heap, or -1 if not present
 
     def __len__(self):
         return len(self.heap)
@@ -11,55 +27,69 @@ class IndexedMinPQ:
     def is_empty(self):
         return len(self.heap) == 0
 
-    # helper: swap heap[i] and heap[j] AND update pos[...] accordingly
-    def _swap(self, i, j):
-        vi = self.heap[i]
-        vj = self.heap[j]
-        temp = self.heap[i]
-        self.heap[i] = self.heap[j]
-        self.heap[j] = temp
-        self.pos[vi] = j
-        self.pos[vj] = i
+    def __contains__(self, v):
+        return self.pos[v] != -1
 
-    # classic heap ops
-    def _sift_up(self, i):
-        # while i has a parent and key at i is smaller than key at parent, swap
-        p = (i - 1) // 2
+    # hole-based sifts: carry v along and write it once where it stops
+    def _sift_up(self, i, v):
+        heap, pos, keys, d = self.heap, self.pos, self.keys, self.d
+        k = keys[v]
         while i > 0:
-            p = (i - 1) // 2
-            if self.keys[self.heap[i]] < self.keys[self.heap[p]]:
-                self._swap(i, p)
-                i = p
-            else:
+            p = (i - 1) // d
+            u = heap[p]
+            if not k < keys[u]:
                 break
+            heap[i] = u
+            pos[u] = i
+            i = p
+        heap[i] = v
+        pos[v] = i
 
-
-    def _sift_down(self, i):
-        # while i has a child with smaller key, swap with the smaller child
-        n = len(self.heap)
+    def _sift_down(self, i, v):
+        heap, pos, keys, d = self.heap, self.pos, self.keys, self.d
+        n = len(heap)
+        k = keys[v]
         while True:
-            left = 2 * i + 1
-            right = 2 * i + 2
-            smallest = i
-
-            if left < n and self.keys[self.heap[left]] < self.keys[self.heap[smallest]]:
-                smallest = left
-            if right < n and self.keys[self.heap[right]] < self.keys[self.heap[smallest]]:
-                smallest = right
-            
-            if smallest == i:
+            first = d * i + 1
+            if first >= n:
                 break
-
-            self._swap(i, smallest)
-            i = smallest
+            # smallest of the (up to) d children
+            end = first + d
+            if end > n:
+                end = n
+            c = first
+            ck = keys[heap[c]]
+            for j in range(first + 1, end):
+                jk = keys[heap[j]]
+                if jk < ck:
+                    c, ck = j, jk
+            if not ck < k:
+                break
+            u = heap[c]
+            heap[i] = u
+            pos[u] = i
+            i = c
+        heap[i] = v
+        pos[v] = i
 
     def push(self, v):
         # insert vertex v if not present
         if self.pos[v] != -1:
             return
         self.heap.append(v)
-        self.pos[v] = len(self.heap) - 1
-        self._sift_up(self.pos[v])
+        self._sift_up(len(self.heap) - 1, v)
+
+    def heapify_all(self, vertices=None):
+        """Add every vertex in vertices (default: all of keys) that is not
+        already queued, then restore the heap bottom-up in O(n) instead of
+        sifting each push up."""
+        heap, pos = self.heap, self.pos
+        for v in range(len(self.keys)) if vertices is None else vertices:
+            if pos[v] == -1:
+                pos[v] = len(heap)
+                heap.append(v)
+        for i in range((len(heap) - 2) // self.d, -1, -1):
+            self._sift_down(i, heap[i])
 
     def pop_min(self):
         # remove and return vertex with smallest key
@@ -68,12 +98,33 @@ class IndexedMinPQ:
         min_v = self.heap[0]
         last = self.heap.pop()
         if self.heap:
-            self.heap[0] = last
-            self.pos[last] = 0
-            self._sift_down(0)
+            self._sift_down(0, last)
         self.pos[min_v] = -1
         return min_v
 
     def decrease_key(self, v):
-        # key already changed in self.keys[v]; just bubble it up
-        self._sift_up(self.pos[v])
\ No newline at end of file
+        # key already changed in self.keys[v]; just bubble it up.
+        # A vertex that is not queued is left alone, like the binary heap did
+        i = self.pos[v]
+        if i != -1:
+            self._sift_up(i, v)
+
+    def increase_key(self, v):
+        # key already raised in self.keys[v]; push it down
+        i = self.pos[v]
+        if i != -1:
+            self._sift_down(i, v)
+
+    def remove(self, v):
+        # take v out wherever it is; the last entry fills its slot and
+        # moves whichever way its key calls for
+        i = self.pos[v]
+        if i == -1:
+            raise KeyError(v)
+        last = self.heap.pop()
+        self.pos[v] = -1
+        if last != v:
+            if i > 0 and self.keys[last] < self.keys[self.heap[(i - 1) // self.d]]:
+                self._sift_up(i, last)
+            else:
+                self._sift_down(i, last)
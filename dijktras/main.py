@@ -1,6 +1,15 @@
 import heapq
+import math
+import os
+import sys
+from array import array
 from indexedminpq import IndexedMinPQ
 
+if __name__ == "__main__":
+    # run as a script; importers put csr-graph on the path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from csr import CSRGraph
+
 INF = float('inf')
 
 def init_single_source(n, s):
@@ -17,6 +26,11 @@ def relax(u, v, w, dist, parent):
     return False
 
 def assert_non_negative(graph):
+    if isinstance(graph, CSRGraph):
+        if graph.m and min(graph.weights) < 0:
+            raise ValueError("Edges must be non-negative for Dijkstra.")
+        return
+
     # pick the right iterable of neighbor-lists
     if isinstance(graph, dict):
         iterable = graph.values()
@@ -29,13 +43,14 @@ def assert_non_negative(graph):
                 raise ValueError("Edges must be non-negative for Dijkstra.")
 
 
-def dijkstra_lazy(graph, s, t=None):
+def dijkstra_lazy(graph, s, t=None, stats=None):
     assert_non_negative(graph)
     n = len(graph)
     dist, parent = init_single_source(n, s)
     
     # min-heap dist, vertex id
     pq = [(0, s)]
+    settled = 0
 
     while pq:
         d, u = heapq.heappop(pq)
@@ -44,6 +59,8 @@ def dijkstra_lazy(graph, s, t=None):
         if d != dist[u]:
             continue
 
+        settled += 1
+
         # Early exit for target
         if t is not None and u == t:
             break
@@ -51,8 +68,95 @@ def dijkstra_lazy(graph, s, t=None):
         for v, w in graph[u]:
             if relax(u, v, w, dist, parent):
                heapq.heappush(pq, (dist[v], v))
+    if stats is not None:
+        stats["settled"] = settled
     return dist, parent
 
+def reverse_graph(graph):
+    # a CSRGraph caches its reverse; for list graphs this builds a new one,
+    # which the caller keeps and passes in as rgraph
+    if isinstance(graph, CSRGraph):
+        return graph.reverse()
+    rgraph = [[] for _ in graph]
+    for u, edges in enumerate(graph):
+        for v, w in edges:
+            rgraph[v].append((u, w))
+    return rgraph
+
+def _reverse_for(graph, rgraph):
+    # never rebuild a list graph's reverse behind the caller's back: only
+    # a CSRGraph has somewhere to keep it between calls
+    if rgraph is not None:
+        return rgraph
+    if isinstance(graph, CSRGraph):
+        return graph.reverse()
+    raise ValueError("list graphs need rgraph=reverse_graph(graph), built once and reused")
+
+def dijkstra_bidirectional(graph, rgraph, s, t, stats=None):
+    """Shortest s-t distance growing one ball from s over graph and one from
+    t over rgraph (the reversed graph, see reverse_graph). rgraph may be
+    None for a CSRGraph, which reuses its cached reverse; list graphs
+    have to pass it in.
+
+    The side with the smaller queue top is expanded next. Every edge
+    scanned into a vertex the other side has reached gives a candidate
+    s-t distance best. The search stops once the two queue tops add up to
+    at least best, since no undiscovered path can be shorter.
+
+    Returns (distance, parent) where parent holds just the s-t path, so
+    reconstruct_path(parent, s, t) works as for the one-sided searches.
+    stats["settled"] counts the vertices settled on both sides.
+    """
+    assert_non_negative(graph)
+    rgraph = _reverse_for(graph, rgraph)
+    n = len(graph)
+    dist_f, parent_f = init_single_source(n, s)
+    dist_b, parent_b = init_single_source(n, t) # parent_b[v] is the next vertex towards t
+    pq_f = [(0, s)]
+    pq_b = [(0, t)]
+    best, meet = (0, s) if s == t else (INF, -1)
+    settled = 0
+
+    while pq_f and pq_b and pq_f[0][0] + pq_b[0][0] < best:
+        if pq_f[0][0] <= pq_b[0][0]:
+            g, pq, dist, parent, other = graph, pq_f, dist_f, parent_f, dist_b
+        else:
+            g, pq, dist, parent, other = rgraph, pq_b, dist_b, parent_b, dist_f
+        d, u = heapq.heappop(pq)
+        if d != dist[u]:
+            continue
+        settled += 1
+
+        for v, w in g[u]:
+            if relax(u, v, w, dist, parent):
+                heapq.heappush(pq, (dist[v], v))
+            if dist[v] + other[v] < best:
+                best = dist[v] + other[v]
+                meet = v
+
+    if stats is not None:
+        stats["settled"] = settled
+    parent = [-1] * n
+    if meet == -1:
+        return INF, parent
+
+    path = reconstruct_path(parent_f, s, meet)
+    while path[-1] != t:
+        path.append(parent_b[path[-1]])
+    # a zero-weight cycle can make the two halves share a vertex; cut the loop
+    where = {}
+    out = []
+    for v in path:
+        if v in where:
+            del out[where[v] + 1:]
+            where = {x: i for i, x in enumerate(out)}
+        else:
+            where[v] = len(out)
+            out.append(v)
+    for a, b in zip(out, out[1:]):
+        parent[b] = a
+    return best, parent
+
 def reconstruct_path(parent, s, t):
     path = []
     cur = t
@@ -64,14 +168,93 @@ def reconstruct_path(parent, s, t):
         cur = parent[cur]
     return []  # no path
 
-def dijkstra_book(graph, s, t=None):
+def astar(graph, s, t, h, stats=None):
+    """dijkstra_lazy steered towards t: the queue is ordered by dist[v] +
+    h(v, t). h must never overestimate the remaining distance and should
+    be consistent (h(u, t) <= w(u, v) + h(v, t)), which all the heuristics
+    below are; then t's distance is final when it is popped. Returns
+    (dist, parent) like dijkstra_lazy."""
     assert_non_negative(graph)
     n = len(graph)
     dist, parent = init_single_source(n, s)
+    pq = [(h(s, t), 0, s)]
+    settled = 0
 
-    pq = IndexedMinPQ(dist)
-    for v in range(n):
-        pq.push(v)
+    while pq:
+        _, d, u = heapq.heappop(pq)
+        if d != dist[u]:
+            continue
+        settled += 1
+        if u == t:
+            break
+
+        for v, w in graph[u]:
+            if relax(u, v, w, dist, parent):
+                heapq.heappush(pq, (dist[v] + h(v, t), dist[v], v))
+    if stats is not None:
+        stats["settled"] = settled
+    return dist, parent
+
+def euclidean_heuristic(coords, min_cost=1.0):
+    """Straight-line distance for vertices at coords[v] = (x, y), scaled by
+    the cheapest cost per unit of length in the graph."""
+    xs = array('d', (x for x, _ in coords))
+    ys = array('d', (y for _, y in coords))
+    def h(v, t):
+        return min_cost * math.hypot(xs[v] - xs[t], ys[v] - ys[t])
+    return h
+
+def manhattan_heuristic(coords, min_cost=1.0):
+    """|dx| + |dy|, admissible when edges only move along the axes (grids)."""
+    xs = array('d', (x for x, _ in coords))
+    ys = array('d', (y for _, y in coords))
+    def h(v, t):
+        return min_cost * (abs(xs[v] - xs[t]) + abs(ys[v] - ys[t]))
+    return h
+
+def pick_landmarks(graph, k, start=0):
+    # farthest-first: each new landmark is the vertex farthest (among the
+    # reachable ones) from the landmarks picked so far
+    landmarks = [start]
+    nearest = dijkstra_lazy(graph, start)[0]
+    while len(landmarks) < k:
+        far = max((d, v) for v, d in enumerate(nearest) if d < INF)[1]
+        if far in landmarks:
+            break
+        landmarks.append(far)
+        nearest = [min(a, b) for a, b in zip(nearest, dijkstra_lazy(graph, far)[0])]
+    return landmarks
+
+def alt_heuristic(graph, landmarks, rgraph=None):
+    """ALT lower bounds from the triangle inequality. For a landmark L,
+    d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L); h is
+    the best of these over all landmarks. Distances from and to each
+    landmark come from dijkstra_lazy (the "to" side on the reverse graph)
+    and are kept as one float64 array per landmark and direction. As in
+    dijkstra_bidirectional, rgraph is required for list graphs."""
+    rgraph = _reverse_for(graph, rgraph)
+    from_l = [array('d', dijkstra_lazy(graph, l)[0]) for l in landmarks]
+    to_l = [array('d', dijkstra_lazy(rgraph, l)[0]) for l in landmarks]
+    tables = list(zip(from_l, to_l))
+    def h(v, t):
+        best = 0
+        for fl, tl in tables:
+            # an unreachable side (inf) gives no usable bound
+            if fl[t] < INF and fl[v] < INF and fl[t] - fl[v] > best:
+                best = fl[t] - fl[v]
+            if tl[v] < INF and tl[t] < INF and tl[v] - tl[t] > best:
+                best = tl[v] - tl[t]
+        return best
+    return h
+
+def dijkstra_book(graph, s, t=None, d=4):
+    assert_non_negative(graph)
+    n = len(graph)
+    dist, parent = init_single_source(n, s)
+
+    # every vertex starts queued; one O(n) heapify instead of n pushes
+    pq = IndexedMinPQ(dist, d)
+    pq.heapify_all()
 
     while not pq.is_empty():
         u = pq.pop_min()
@@ -83,30 +266,78 @@ def dijkstra_book(graph, s, t=None):
                 pq.decrease_key(v)
     return dist, parent
 
-graph = [
-    [(1,1), (2,4)],  # 0
-    [(2,2), (3,5)],  # 1
-    [(3,1)],         # 2
-    []               # 3
-]
+if __name__ == "__main__":
+    graph = [
+        [(1,1), (2,4)],  # 0
+        [(2,2), (3,5)],  # 1
+        [(3,1)],         # 2
+        []               # 3
+    ]
 
-dist, parent = dijkstra_lazy(graph, 0, 2)
-print(dist, parent)
+    dist, parent = dijkstra_lazy(graph, 0, 2)
+    print(dist, parent)
 
-dist, parent = dijkstra_book(graph, 0)
-print(dist, parent)
+    dist, parent = dijkstra_book(graph, 0)
+    print(dist, parent)
 
-# Expect: dist[0] == 0, and all others are INF
-_, parent = dijkstra_lazy(graph, 0)
-print(reconstruct_path(parent, 0, 3))
-# Expect: [0, 1, 2, 3]
+    # same graph as CSR arrays, vertex ids unchanged
+    csr = CSRGraph.from_adjacency(graph)
+    assert dijkstra_lazy(csr, 0) == dijkstra_book(csr, 0) == dijkstra_lazy(graph, 0)
 
-INF = float('inf')
-keys = [5, 7, 9, 3]  # keys indexed by vertex id
-pq = IndexedMinPQ(keys)
-pq.push(0); pq.push(1); pq.push(2); pq.push(3)
-# min should be vertex 3 (key=3), then 0 (5), then 1 (7), then 2 (9)
-assert pq.pop_min() == 3
-assert pq.pop_min() == 0
-assert pq.pop_min() == 1
-assert pq.pop_min() == 2
\ No newline at end of file
+    # Expect: dist[0] == 0, and all others are INF
+    _, parent = dijkstra_lazy(graph, 0)
+    print(reconstruct_path(parent, 0, 3))
+    # Expect: [0, 1, 2, 3]
+
+    rgraph = reverse_graph(graph) # built once, shared by the searches below
+    d, parent = dijkstra_bidirectional(graph, rgraph, 0, 3)
+    assert d == 4 and reconstruct_path(parent, 0, 3) == [0, 1, 2, 3]
+    assert dijkstra_bidirectional(csr, None, 0, 3)[0] == 4 # CSR keeps its own
+    try:
+        dijkstra_bidirectional(graph, None, 0, 3)
+        raise AssertionError("list graph without rgraph")
+    except ValueError:
+        pass
+
+    alt = alt_heuristic(graph, pick_landmarks(graph, 2), rgraph)
+    dist, parent = astar(graph, 0, 3, alt)
+    assert dist[3] == 4 and reconstruct_path(parent, 0, 3) == [0, 1, 2, 3]
+
+    INF = float('inf')
+    keys = [5, 7, 9, 3]  # keys indexed by vertex id
+    pq = IndexedMinPQ(keys)
+    pq.push(0); pq.push(1); pq.push(2); pq.push(3)
+    # min should be vertex 3 (key=3), then 0 (5), then 1 (7), then 2 (9)
+    assert pq.pop_min() == 3
+    assert pq.pop_min() == 0
+    assert pq.pop_min() == 1
+    assert pq.pop_min() == 2
+
+    import random
+    rnd = random.Random(3)
+    for d in (2, 3, 4, 8):
+        keys = [rnd.randrange(1000) for _ in range(200)]
+        pq = IndexedMinPQ(keys, d)
+        pq.heapify_all(range(0, 200, 2))
+        for v in range(1, 200, 2):
+            pq.push(v)
+        for v in range(0, 200, 3):
+            delta = rnd.randrange(-500, 500)
+            keys[v] += delta
+            if v % 2:
+                pq.remove(v)
+            elif delta < 0:
+                pq.decrease_key(v)
+            else:
+                pq.increase_key(v)
+        left = sorted((keys[v], v) for v in range(200) if v % 3 or not v % 2)
+        # changing the key of a vertex that is no longer queued is a no-op
+        out = [pq.pop_min()]
+        keys[out[0]] -= 1
+        pq.decrease_key(out[0])
+        pq.increase_key(out[0])
+        keys[out[0]] += 1
+        while pq:
+            out.append(pq.pop_min())
+        assert [keys[v] for v in out] == [k for k, _ in left]
+        assert dijkstra_book(csr, 0, d=d) == dijkstra_lazy(csr, 0)
@@ -1,4 +1,12 @@
 import heapq
+import os
+import sys
+from array import array
+
+if __name__ == "__main__":
+    # run as a script; importers put csr-graph on the path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "csr-graph"))
+from csr import CSRGraph
 
 
 class NegativeCycleError(Exception):
@@ -41,7 +49,7 @@ def bellman_ford(V, E, s):
 def compute_potential_q(V, E):
     q = object()
     Vq = V + [q] # add q as a temp vert
-    Eq = edges + [[q, v, 0] for v in V] # add 0 weight edges to all nodes from q
+    Eq = E + [[q, v, 0] for v in V] # add 0 weight edges to all nodes from q
     dists, _ = bellman_ford(Vq, Eq, q) # get shortest dists from q
     return { v: dists[v] for v in V }
 
@@ -55,6 +63,8 @@ def reweight_edges(V, E, h):
 
 
 def dijkstras(G, s, t = None):
+    if isinstance(G, CSRGraph):
+        return dijkstras_csr(G, s, t)
     dist = { v: float('inf') for v in G }
     dist[s] = 0
     pq = [(0, s)]
@@ -75,6 +85,65 @@ def dijkstras(G, s, t = None):
                 heapq.heappush(pq, (dist[v], v))
     return dist
 
+def dijkstras_csr(G, s, t = None):
+    # same search over the CSR arrays; s and t may be labels or ids like in
+    # bellman_ford_csr, dist is a list indexed by vertex id
+    return _dijkstras_ids(G, G.vertex(s), None if t is None else G.vertex(t))
+
+def _dijkstras_ids(G, s, t):
+    offsets, targets, weights = G.offsets, G.targets, G.weights
+    dist = [float('inf')] * G.n
+    dist[s] = 0
+    pq = [(0, s)]
+
+    while pq:
+        d, u = heapq.heappop(pq)
+        if d != dist[u]:
+            continue
+        if t is not None and u == t:
+            break
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if dist[v] > d + weights[i]:
+                dist[v] = d + weights[i]
+                heapq.heappush(pq, (dist[v], v))
+    return dist
+
+def compute_potential_csr(G):
+    # Bellman-Ford from the virtual q: its 0-weight edges mean every
+    # vertex starts at 0, and with q there are n + 1 vertices so n passes
+    offsets, targets, weights = G.offsets, G.targets, G.weights
+    h = [0] * G.n
+    for _ in range(G.n + 1):
+        changed = False
+        for u in range(G.n):
+            hu = h[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if h[v] > hu + weights[i]:
+                    h[v] = hu + weights[i]
+                    changed = True
+        if not changed:
+            return h
+    raise NegativeCycleError("Negative cycle detected")
+
+def johnsons_csr(G):
+    h = compute_potential_csr(G)
+    offsets, targets, weights = G.offsets, G.targets, G.weights
+    w_primes = array(weights.typecode, bytes(weights.itemsize * len(weights)))
+    for u in range(G.n):
+        for i in range(offsets[u], offsets[u + 1]):
+            w_primes[i] = weights[i] + h[u] - h[targets[i]]
+    reweighted = G.with_weights(w_primes) # offsets/targets shared
+
+    inf = float('inf')
+    d_mat = []
+    for s in range(G.n):
+        row = _dijkstras_ids(reweighted, s, None) # s is already an id
+        d_mat.append([inf if dv == inf else dv - h[s] + h[v] for v, dv in enumerate(row)])
+    d = { G.label(s): { G.label(v): dv for v, dv in enumerate(row) } for s, row in enumerate(d_mat) }
+    return d, d_mat
+
 def unshift_all(V, dprime_all, h):
     d = { s: {} for s in V }
     d_mat = [[float('inf') for _ in range(len(V))] for _ in range(len(V))]
@@ -94,14 +163,26 @@ edges = [("A","B",1),
          ("D","B",1)
         ]
 
-def johnsons(V, E):
+def johnsons(V, E=None):
+    """All-pairs distances for vertex list V and edge list E, or for a
+    CSRGraph passed as V (rows of d_mat then follow vertex ids)."""
+    if isinstance(V, CSRGraph):
+        return johnsons_csr(V)
     h = compute_potential_q(V, E)
-    w_primes = reweight_edges(vertices, edges, h)
-    dprime_all = { s: dijkstras(w_primes, s) for s in vertices }
+    w_primes = reweight_edges(V, E, h)
+    dprime_all = { s: dijkstras(w_primes, s) for s in V }
     d_shifted = unshift_all(V, dprime_all, h)
     return d_shifted
 
 D, D_MAT = johnsons(vertices, edges)
 for s in vertices:
     print(s, D[s])
-print(D_MAT)
\ No newline at end of file
+print(D_MAT)
+
+assert johnsons(CSRGraph.from_edges(edges)) == (D, D_MAT)
+
+# labels go through G.vertex, so integer labels are not mistaken for ids
+G = CSRGraph.from_edges([(5, 3, 1), (3, 9, 2), (5, 9, 7)])
+dist = dijkstras_csr(G, 5)
+assert dist[G.vertex(9)] == 3 and dijkstras_csr(G, 5, 3)[G.vertex(3)] == 1
+assert johnsons(G)[0][5] == {5: 0, 3: 1, 9: 3}
@@ -0,0 +1,258 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from main import (HASHERS, MerkleImplicit, MerkleTree, build_zero_hashes, merkle_root_stream,
+                  next_pow2, read_chunks, sha256, verify, verify_batch, verify_indexed,
+                  verify_multiproof)
+from mmr import MMR
+from smt import SparseMerkleTree, verify_sparse
+
+
+class ListMerkleTree:
+    """The list-of-bytes build used before levels became packed buffers,
+    kept as the baseline: every parent concatenates its two children."""
+
+    def __init__(self, leaves: list[bytes]):
+        pow_two = next_pow2(len(leaves))
+        self.zero = build_zero_hashes(pow_two.bit_length() - 1)
+        cur = [sha256(x) for x in leaves] + [self.zero[0]] * (pow_two - len(leaves))
+        self.levels = [cur]
+        while len(cur) > 1:
+            cur = [sha256(cur[i] + cur[i+1]) for i in range(0, len(cur), 2)]
+            self.levels.append(cur)
+
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+
+class ClearingMerkleImplicit(MerkleImplicit):
+    """MerkleImplicit as it was before path eviction: every write drops
+    the whole cache."""
+
+    def _evict_path(self, i):
+        self._cache.clear()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def kept(fn):
+    # bytes still allocated by whatever fn built
+    tracemalloc.start()
+    out = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, size
+
+
+def bench_build(sizes=(1 << 16, 1 << 20), leaf_size=64):
+    print(f"MerkleTree build ({leaf_size}-byte leaves)")
+    for n in sizes:
+        leaves = [os.urandom(leaf_size) for _ in range(n)]
+        base, secs = timed(lambda: ListMerkleTree(leaves))
+        _, size = kept(lambda: ListMerkleTree(leaves))
+        print(f"  n={n:>9,}  {'list + sha256':<16} {n / secs:12,.0f} leaves/s"
+              f"  {size / 2**20:8.1f} MiB")
+        for name in HASHERS:
+            tree, secs = timed(lambda: MerkleTree(leaves, hasher=name))
+            _, size = kept(lambda: MerkleTree(leaves, hasher=name))
+            if name == "sha256":
+                assert tree.root() == base.root()
+            print(f"  n={n:>9,}  {name:<16} {n / secs:12,.0f} leaves/s"
+                  f"  {size / 2**20:8.1f} MiB")
+
+
+def bench_parallel(n=1 << 20, leaf_size=64, workers=(1, 2, 4, 8)):
+    print(f"MerkleTree.build_parallel (n={n:,}, {os.cpu_count()} cores)")
+    leaves = [os.urandom(leaf_size) for _ in range(n)]
+    base, secs = timed(lambda: MerkleTree(leaves))
+    print(f"  {'serial':<10}            {n / secs:12,.0f} leaves/s")
+    for processes in (False, True):
+        kind = "processes" if processes else "threads"
+        for count in workers:
+            tree, secs = timed(lambda: MerkleTree.build_parallel(leaves, count, processes))
+            assert tree.root() == base.root()
+            print(f"  {kind:<10} workers={count}  {n / secs:12,.0f} leaves/s")
+
+
+def peak(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn()
+    secs = time.perf_counter() - start
+    top = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, secs, top
+
+
+def bench_stream(mib=128, chunk_size=4096):
+    print(f"root of a {mib} MiB file in {chunk_size}-byte leaves")
+    path = os.path.join(tempfile.mkdtemp(), "data.bin")
+    with open(path, "wb") as f:
+        for _ in range(mib):
+            f.write(os.urandom(1 << 20))
+    runs = [
+        ("MerkleTree", lambda: MerkleTree(list(read_chunks(path, chunk_size))).root()),
+        ("stream", lambda: merkle_root_stream(path, chunk_size)),
+        ("stream mmap", lambda: merkle_root_stream(path, chunk_size, use_mmap=True)),
+    ]
+    roots = set()
+    for name, fn in runs:
+        root, secs, top = peak(fn)
+        roots.add(root)
+        print(f"  {name:<12} {mib / secs:8,.0f} MiB/s  peak {top / 2**20:8.2f} MiB")
+    os.remove(path)
+    assert len(roots) == 1
+
+
+def bench_multiproof(n=1 << 18, batches=(10, 1_000, 10_000)):
+    print(f"batch audit proofs (n={n:,})")
+    leaves = [os.urandom(32) for _ in range(n)]
+    tree = MerkleTree(leaves)
+    root = tree.root()
+    for k in batches:
+        picks = random.sample(range(n), k)
+        picked = [leaves[i] for i in picks]
+        proofs = [tree.proof(i) for i in picks]
+        single = sum(32 * len(p) for p in proofs)
+        ok, single_secs = timed(lambda: all(verify(leaves[i], p, root) for i, p in zip(picks, proofs)))
+        assert ok
+        mp = tree.multiproof(picks)
+        ok, multi_secs = timed(lambda: verify_multiproof(picked, picks, mp, root))
+        assert ok
+        print(f"  k={k:>6,}  proof bytes {single:>11,} -> {32 * len(mp):>10,}"
+              f"   verify {single_secs * 1e3:8.1f} ms -> {multi_secs * 1e3:7.1f} ms")
+
+
+def bench_implicit_writes(n=1 << 16, rounds=20, proofs_per_write=100):
+    print(f"MerkleImplicit, 1 write per {proofs_per_write} proofs (n={n:,})")
+    leaves = [os.urandom(32) for _ in range(n)]
+    for cls in (ClearingMerkleImplicit, MerkleImplicit):
+        tree = cls(list(leaves))
+        tree.root() # warm cache
+        rnd = random.Random(1)
+
+        def run():
+            for _ in range(rounds):
+                if rnd.random() < 0.5:
+                    tree.update(rnd.randrange(tree.n), os.urandom(32))
+                else:
+                    tree.append(os.urandom(32))
+                for _ in range(proofs_per_write):
+                    tree.proof(rnd.randrange(tree.n))
+            return tree.root()
+
+        root, secs = timed(run)
+        ops = rounds * (proofs_per_write + 1)
+        print(f"  {cls.__name__:<22} {ops / secs:12,.0f} ops/s")
+
+
+def bench_mmr(n=100_000):
+    print(f"append-only log, append + root per entry (n={n:,})")
+    entries = [os.urandom(32) for _ in range(n)]
+
+    def run(acc):
+        for e in entries:
+            acc.append(e)
+            acc.root()
+
+    implicit = MerkleImplicit([])
+    _, secs = timed(lambda: run(implicit))
+    print(f"  {'MerkleImplicit':<16} {n / secs:10,.0f} appends/s")
+    _, secs = timed(lambda: run(MMR()))
+    print(f"  {'MMR memory':<16} {n / secs:10,.0f} appends/s")
+    _, secs = timed(lambda: run(MMR(store=False)))
+    print(f"  {'MMR peaks only':<16} {n / secs:10,.0f} appends/s")
+    path = os.path.join(tempfile.mkdtemp(), "log.mmr")
+    with MMR(path) as disk:
+        _, secs = timed(lambda: run(disk))
+    print(f"  {'MMR file':<16} {n / secs:10,.0f} appends/s")
+    os.remove(path)
+
+
+def bench_update_many(n=1 << 20, batches=(16, 1_024, 65_536)):
+    print(f"MerkleTree batch updates (n={n:,})")
+    tree = MerkleTree([os.urandom(32) for _ in range(n)])
+    for k in batches:
+        start = random.randrange(n - k)
+        fresh = {start + j: os.urandom(32) for j in range(k)} # one contiguous block
+        _, loop_secs = timed(lambda: [tree.update(i, leaf) for i, leaf in fresh.items()])
+        root = tree.root()
+        _, batch_secs = timed(lambda: tree.update_many(fresh))
+        assert tree.root() == root
+        print(f"  k={k:>7,}  update() loop {loop_secs * 1e3:9.1f} ms"
+              f"   update_many {batch_secs * 1e3:8.1f} ms")
+
+
+def bench_persist(n=1 << 20):
+    print(f"restart cost (n={n:,})")
+    leaves = [os.urandom(32) for _ in range(n)]
+    tree, build_secs = timed(lambda: MerkleTree(leaves))
+    path = os.path.join(tempfile.mkdtemp(), "tree.mkl")
+    tree.save(path)
+
+    def reopen():
+        mapped = MerkleTree.load(path)
+        mapped.proof(random.randrange(n))
+        return mapped
+
+    mapped, load_secs = timed(reopen)
+    assert mapped.root() == tree.root()
+    mapped.close()
+    print(f"  rebuild {build_secs * 1e3:9.1f} ms   load + proof {load_secs * 1e3:6.2f} ms"
+          f"   file {os.path.getsize(path) / 2**20:.0f} MiB")
+    os.remove(path)
+
+
+def bench_sparse(n=2_000, proofs=2_000):
+    print(f"SparseMerkleTree (n={n:,} keys)")
+    smt = SparseMerkleTree()
+    keys = [os.urandom(32) for _ in range(n)]
+    _, secs = timed(lambda: [smt.set(k, k) for k in keys])
+    print(f"  set      {n / secs:10,.0f} /s   {len(smt.nodes):,} stored nodes")
+    root = smt.root()
+    picks = [random.choice(keys) for _ in range(proofs)]
+    made, secs = timed(lambda: [smt.proof(k) for k in picks])
+    sent = sum(len(s) for _, s in made) / proofs
+    print(f"  proof    {proofs / secs:10,.0f} /s   {sent:.1f} of 256 siblings sent on average")
+    ok, secs = timed(lambda: all(verify_sparse(k, k, p, root) for k, p in zip(picks, made)))
+    assert ok
+    print(f"  verify   {proofs / secs:10,.0f} /s")
+
+
+def bench_verify_batch(n=1 << 18, counts=(1_000, 50_000, 200_000), workers=4):
+    print(f"bulk proof verification (n={n:,})")
+    leaves = [os.urandom(32) for _ in range(n)]
+    tree = MerkleTree(leaves)
+    root = tree.root()
+    for k in counts:
+        picks = [random.randrange(n) for _ in range(k)]
+        items = [(leaves[i], i, [s for s, _ in tree.proof(i)]) for i in picks]
+        ok, secs = timed(lambda: all(verify_indexed(leaf, p, i, root) for leaf, i, p in items))
+        assert ok
+        print(f"  k={k:>8,}  scalar loop        {k / secs:10,.0f} proofs/s")
+        ok, secs = timed(lambda: verify_batch(items, root))
+        assert all(ok)
+        print(f"  k={k:>8,}  verify_batch       {k / secs:10,.0f} proofs/s")
+        ok, secs = timed(lambda: verify_batch(items, root, workers=workers))
+        assert all(ok)
+        print(f"  k={k:>8,}  verify_batch x{workers}    {k / secs:10,.0f} proofs/s")
+
+
+if __name__ == "__main__":
+    bench_build()
+    bench_parallel()
+    bench_stream()
+    bench_multiproof()
+    bench_implicit_writes()
+    bench_mmr()
+    bench_update_many()
+    bench_persist()
+    bench_sparse()
+    bench_verify_batch()
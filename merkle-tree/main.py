@@ -1,52 +1,223 @@
 import hashlib
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 from math import ceil, log2
 
+DIGEST = 32 # every hasher here produces 32-byte digests
+
+# name -> hashlib-style constructor, new(data).digest() is the hash
+HASHERS = {
+    "sha256": hashlib.sha256,
+    "blake2b": partial(hashlib.blake2b, digest_size=DIGEST),
+}
+try:
+    from blake3 import blake3
+    HASHERS["blake3"] = blake3
+except ImportError:
+    pass
+
+# on-disk MerkleTree: magic, version, hasher name, leaf count, height. The
+# levels follow at LEVELS_OFFSET, level 0 first, each padded to full width
+TREE_MAGIC = b"MKLT"
+TREE_VERSION = 1
+TREE_HEADER = struct.Struct("<4sH16sqH")
+LEVELS_OFFSET = 64
+
+def get_hasher(hasher="sha256"):
+    """Accept a name from HASHERS or a constructor like hashlib.sha256."""
+    return HASHERS[hasher] if isinstance(hasher, str) else hasher
+
 def sha256(b: bytes) -> bytes:
     return hashlib.sha256(b).digest()
 
 def next_pow2(n: int) -> int:
     return 1 if n <= 1 else 1 << (n-1).bit_length()
 
-def build_zero_hashes(height: int) -> list[bytes]:
+def build_zero_hashes(height: int, hasher="sha256") -> list[bytes]:
     """ZERO[h] is the hash of an empty subtree of height h (leaves at h=0)."""
-    zero = [sha256(b"")]
+    new = get_hasher(hasher)
+    zero = [new(b"").digest()]
     for _ in range(height):
-        zero.append(sha256(zero[-1] + zero[-1])) # -1 gets you the last value in the list
+        zero.append(new(zero[-1] + zero[-1]).digest()) # -1 gets you the last value in the list
     return zero
 
 zero_hash_list = build_zero_hashes(4)
 
+def hash_leaves(leaves, hasher="sha256") -> bytearray:
+    """Level 0 as one buffer of concatenated leaf digests."""
+    new = get_hasher(hasher)
+    return bytearray(b"".join([new(x).digest() for x in leaves]))
+
+def hash_level(cur, hasher="sha256") -> bytearray:
+    """Parent level of a buffer of digests. Each pair is hashed straight from
+    a memoryview slice, so no 64-byte concatenation is ever built."""
+    new = get_hasher(hasher)
+    mv = memoryview(cur)
+    pair = 2 * DIGEST
+    return bytearray(b"".join([new(mv[i:i + pair]).digest() for i in range(0, len(mv), pair)]))
+
+def build_levels(cur: bytearray, hasher="sha256") -> list[bytearray]:
+    """All levels from a power-of-two level 0 up to the single root digest."""
+    levels = [cur]
+    while len(cur) > DIGEST:
+        cur = hash_level(cur, hasher)
+        levels.append(cur)
+    return levels
+
+def _build_shard(leaves, pad, hasher):
+    # worker side of MerkleTree.build_parallel: the levels of one aligned
+    # subtree, padded with empty leaves up to its full width
+    cur = hash_leaves(leaves, hasher)
+    cur += build_zero_hashes(0, hasher)[0] * pad
+    return build_levels(cur, hasher)
+
 class MerkleTree:
-    def __init__(self, leaves: list[bytes]):
+    """Levels are bytearrays of packed 32-byte digests (memoryviews of the
+    file for a loaded tree), levels[h][32*i:32*i+32] is node i of level h.
+    hasher is a HASHERS name or a hashlib-style constructor."""
+
+    def __init__(self, leaves: list[bytes], hasher="sha256"):
+        self.new = get_hasher(hasher)
+        self.mm = None # set when the levels are views of a saved file
         self.n = len(leaves)
-        if self.n == 0:
-            self.height = 0
-            self.levels = [[sha256(b"")]]
-            self.zero = [sha256(b"")]
-            return
-        elif self.n == 1:
+        if self.n <= 1:
             self.height = 0
-            self.levels = [[sha256(leaves[0])]]
-            self.zero = [sha256(b"")]
+            self.zero = build_zero_hashes(0, self.new)
+            self.levels = [hash_leaves(leaves, self.new) if leaves else bytearray(self.zero[0])]
             return
 
         pow_two = next_pow2(self.n)
         self.height = (pow_two.bit_length() - 1)
-        self.zero = build_zero_hashes(self.height)
+        self.zero = build_zero_hashes(self.height, self.new)
 
         # Level 0 hash leaves and pad with zero hashes
-        level0 = [sha256(x) for x in leaves] + [self.zero[0]] * (pow_two - self.n)
+        cur = hash_leaves(leaves, self.new)
+        cur += self.zero[0] * (pow_two - self.n)
+        self.levels = build_levels(cur, self.new)
+
+    @classmethod
+    def build_parallel(cls, leaves: list[bytes], workers=None, processes=False, hasher="sha256"):
+        """Same tree as MerkleTree(leaves, hasher), built on a pool.
+
+        The padded leaf range is cut into aligned power-of-two shards and
+        each worker builds the levels of its shard's subtree. Shards past
+        the last leaf are all padding and are filled in from the zero
+        hashes. The main process stitches the shard levels together and
+        hashes the few levels above them.
+
+        hashlib only drops the GIL for inputs of 2 KiB or more, so with
+        threads the level hashing (64-byte inputs) stays serial. Pass
+        processes=True to spread it over cores; the leaves and the shard
+        levels are then pickled to and from the workers, and a callable
+        hasher has to be picklable.
+        """
+        n = len(leaves)
+        workers = workers or os.cpu_count()
+        if n <= 1:
+            return cls(leaves, hasher)
+
+        pow_two = next_pow2(n)
+        height = pow_two.bit_length() - 1
+        zero = build_zero_hashes(height, hasher)
+        shards = min(pow_two, next_pow2(4 * workers)) # a few per worker evens out the tail
+        size = pow_two // shards
+        live = -(-n // size) # shards holding at least one real leaf
+        chunks = [leaves[j * size:(j + 1) * size] for j in range(live)]
+        pads = [size - len(c) for c in chunks]
+
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(workers) as ex:
+            parts = list(ex.map(_build_shard, chunks, pads, repeat(hasher)))
+
+        sub = size.bit_length() - 1
+        levels = []
+        for h in range(sub + 1):
+            level = bytearray(b"".join(p[h] for p in parts))
+            level += zero[h] * ((shards - live) << (sub - h))
+            levels.append(level)
+        levels[sub:] = build_levels(levels[sub], hasher)
+
+        tree = cls([], hasher)
+        tree.n = n
+        tree.height = height
+        tree.zero = zero
+        tree.levels = levels
+        return tree
+
+    def save(self, path) -> None:
+        """Write the tree in the format load() maps. Only HASHERS hashers
+        can be saved, the file records the hasher by name."""
+        names = [name for name, fn in HASHERS.items() if fn is self.new]
+        if not names:
+            raise ValueError("only hashers registered in HASHERS can be saved")
+        with open(path, "wb") as f:
+            header = TREE_HEADER.pack(TREE_MAGIC, TREE_VERSION, names[0].encode(), self.n, self.height)
+            f.write(header.ljust(LEVELS_OFFSET, b"\0"))
+            for level in self.levels:
+                f.write(level)
+
+    @classmethod
+    def load(cls, path, writable=True):
+        """Open a saved tree without reading it. The levels become
+        memoryviews over an mmap of the file, so only the pages that
+        root(), proof() or update() touch are read, and updates write
+        straight through to the file (flush() to force them out)."""
+        with open(path, "r+b" if writable else "rb") as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            mm = mmap.mmap(f.fileno(), 0, access=access)
+        magic, version, name, n, height = TREE_HEADER.unpack_from(mm, 0)
+        if magic != TREE_MAGIC or version != TREE_VERSION:
+            mm.close()
+            raise ValueError(f"{path} is not a saved MerkleTree")
+        if len(mm) != LEVELS_OFFSET + DIGEST * ((2 << height) - 1):
+            mm.close()
+            raise ValueError(f"{path} is truncated")
+
+        tree = cls([], name.rstrip(b"\0").decode())
+        tree.n = n
+        tree.height = height
+        tree.zero = build_zero_hashes(height, tree.new)
+        tree.mm = mm
+        view = memoryview(mm)
+        levels = []
+        off = LEVELS_OFFSET
+        for h in range(height + 1):
+            size = DIGEST << (height - h)
+            levels.append(view[off:off + size])
+            off += size
+        view.release()
+        tree.levels = levels
+        return tree
+
+    def flush(self) -> None:
+        if self.mm is not None:
+            self.mm.flush()
+
+    def close(self) -> None:
+        """Unmap a loaded tree; a no-op for trees built in memory."""
+        if self.mm is None:
+            return
+        for level in self.levels:
+            level.release()
+        self.levels = []
+        self.mm.close()
+        self.mm = None
+
+    def __enter__(self):
+        return self
 
-        levels = [level0]
-        cur = level0
-        for _ in range(0, len(cur), 2):
-            nxt = [sha256(cur[i] + cur[i+1]) for i in range(0, len(cur), 2)]
-            levels.append(nxt)
-            cur = nxt
-        self.levels = levels
+    def __exit__(self, *exc):
+        self.close()
+
+    def node(self, h: int, i: int) -> bytes:
+        return bytes(self.levels[h][i * DIGEST:(i + 1) * DIGEST])
 
     def root(self) -> bytes:
-        return self.levels[-1][0]
+        return self.node(self.height, 0)
 
     def proof(self, index: int) -> list[tuple[bytes, str]]:
         if not (0 <= index < self.n):
@@ -57,77 +228,255 @@ class MerkleTree:
         for h in range(self.height):
             sib = i ^ 1 # XOR with 1 flips the farthest right bit which moves by 1 up if even, and down by 1 if odd
             # 0011 = 3 | 0011 ^ 0001 = 0010 = 2
-            sibling = self.levels[h][sib]
+            sibling = self.node(h, sib)
             direction = 'R' if (i % 2 == 0) else 'L'
             proof.append((sibling, direction))
             i >>= 1 # shift right by 1 bit equivalent to integer division by 2 gets the right parent i in that level
         return proof
 
+    def multiproof(self, indices) -> list[bytes]:
+        """Sibling digests for several leaves at once, for verify_multiproof.
+
+        Going up level by level, a node needs its sibling from the proof
+        only when that sibling is not itself known (a requested leaf or an
+        ancestor of one), so shared paths are sent once. Digests are listed
+        level by level, left to right.
+        """
+        idx = sorted(set(indices))
+        if not idx or idx[0] < 0 or idx[-1] >= self.n:
+            raise IndexError("leaf index out of range")
+
+        proof: list[bytes] = []
+        for h in range(self.height):
+            up = []
+            j = 0
+            while j < len(idx):
+                i = idx[j]
+                if i & 1 == 0 and j + 1 < len(idx) and idx[j + 1] == i + 1:
+                    j += 2 # both children known, nothing to send
+                else:
+                    proof.append(self.node(h, i ^ 1))
+                    j += 1
+                up.append(i >> 1)
+            idx = up
+        return proof
+
     def update(self, index: int, new_leaf: bytes) -> None:
         if not (0 <= index < self.n):
             raise IndexError("leaf index out of range")
         
         # set new leaf hash
-        self.levels[0][index] = sha256(new_leaf)
+        self.levels[0][index * DIGEST:(index + 1) * DIGEST] = self.new(new_leaf).digest()
         
         # climb up and recompute
         i = index
         for h in range(self.height):
             parent_idx = i >> 1
             left_idx = i & ~1 # gets even sibling ~1 Bitwise not of 1 0001 -> 1110 then AND takes 0101 = 5 and 1110 -> 0100 = 4
-            right_idx = left_idx + 1
-            left_hash = self.levels[h][left_idx]
-            right_hash = self.levels[h][right_idx]
-            self.levels[h+1][parent_idx] = sha256(left_hash + right_hash)
+            pair = memoryview(self.levels[h])[left_idx * DIGEST:(left_idx + 2) * DIGEST]
+            self.levels[h+1][parent_idx * DIGEST:(parent_idx + 1) * DIGEST] = self.new(pair).digest()
             i = parent_idx
 
-def verify(leaf: bytes, proof: list[tuple[bytes, str]], root: bytes) -> bool:
-    accum = sha256(leaf)
+    def update_many(self, updates: dict[int, bytes]) -> None:
+        """Apply {index: new_leaf} at once. Level 0 is rewritten first and
+        then every dirty parent is rehashed once per level, so k leaves
+        sharing ancestors cost far fewer than k * height hashes (k + log n
+        for a contiguous run)."""
+        for index in updates:
+            if not (0 <= index < self.n):
+                raise IndexError("leaf index out of range")
+
+        new = self.new
+        level0 = self.levels[0]
+        for index, leaf in updates.items():
+            level0[index * DIGEST:(index + 1) * DIGEST] = new(leaf).digest()
+
+        dirty = {i >> 1 for i in updates}
+        for h in range(self.height):
+            parent = self.levels[h + 1]
+            with memoryview(self.levels[h]) as child:
+                for p in dirty:
+                    pair = child[2 * p * DIGEST:(2 * p + 2) * DIGEST]
+                    parent[p * DIGEST:(p + 1) * DIGEST] = new(pair).digest()
+            dirty = {p >> 1 for p in dirty}
+
+def verify(leaf: bytes, proof: list[tuple[bytes, str]], root: bytes, hasher="sha256") -> bool:
+    new = get_hasher(hasher)
+    accum = new(leaf).digest()
     for sibling, direction in proof:
         if direction == 'R':
-            accum = sha256(accum + sibling)
+            accum = new(accum + sibling).digest()
         elif direction == 'L':
-            accum = sha256(sibling + accum)
+            accum = new(sibling + accum).digest()
         else:
             return False
     return accum == root
 
-def verify_indexed(leaf: bytes, proof: list[bytes], index: int, root: bytes) -> bool:
-    accum = sha256(leaf)
+def verify_indexed(leaf: bytes, proof: list[bytes], index: int, root: bytes, hasher="sha256") -> bool:
+    new = get_hasher(hasher)
+    accum = new(leaf).digest()
     for h, sib in enumerate(proof):
         bit = (index >> h) & 1
-        accum = sha256(sib + accum) if bit else sha256(accum + sib)
+        accum = new(sib + accum).digest() if bit else new(accum + sib).digest()
     return accum == root
 
-t1 = MerkleTree([b"a", b"b", b"c"])
-t2 = MerkleTree([b"a", b"b", b"d"])
-assert t1.root() != t2.root()
-print(t1.root().hex(), t2.root().hex())
-
-# 2) proofs verify for each real leaf
-leaves = [b"a", b"b", b"c"]
-t = MerkleTree(leaves)
-for i, leaf in enumerate(leaves):
-    p = t.proof(i)
-    assert verify(leaf, p, t.root())
-
-# 3) tamper detection
-p_bad = list(t.proof(0))
-p_bad[0] = (sha256(b"not-the-sibling"), p_bad[0][1])
-assert not verify(leaves[0], p_bad, t.root())
-
-# 4) updates change root and still verify
-root_before = t.root()
-t.update(1, b"B")
-root_after = t.root()
-assert root_after != root_before
-assert verify(b"B", t.proof(1), root_after)
-
-# 5) edge cases: 0 or 1 leaf
-t_empty = MerkleTree([])
-t_one = MerkleTree([b"solo"])
-assert t_empty.root() == sha256(b"")
-assert verify(b"solo", t_one.proof(0), t_one.root())
+def verify_batch(items, root: bytes, workers=None, hasher="sha256") -> list[bool]:
+    """verify_indexed over many (leaf, index, proof) items; returns one bool
+    per item, in order.
+
+    Every proof that checks out proves all the nodes on its path, and
+    those go into a table keyed by (proof length, level, index). Later
+    proofs climb only until they reach a proven node: if their digest
+    matches it, the rest of the proof just has to repeat the siblings of
+    the proof that proved the node, which is one list compare instead of
+    a hash per
+    level. In a big batch most proofs meet a proven node within a few
+    levels of the leaf. With workers the batch is sorted by index and cut
+    into contiguous runs, one per thread, so each run still shares its
+    upper levels; as with build_parallel the hashes are too small to drop
+    the GIL, so this only pays off on a free-threaded build.
+    """
+    new = get_hasher(hasher)
+    items = list(items)
+    if not workers or workers == 1 or len(items) < 2:
+        return _verify_run(items, root, new)
+
+    order = sorted(range(len(items)), key=lambda j: items[j][1])
+    step = -(-len(order) // workers)
+    runs = [order[i:i + step] for i in range(0, len(order), step)]
+    out = [False] * len(items)
+    with ThreadPoolExecutor(workers) as ex:
+        parts = ex.map(lambda run: _verify_run([items[j] for j in run], root, new), runs)
+        for run, part in zip(runs, parts):
+            for j, ok in zip(run, part):
+                out[j] = ok
+    return out
+
+def _verify_run(items, root, new) -> list[bool]:
+    # tables[L][h][i] = (digest of node i on level h, a proof that reached
+    # it), per proof length L: a proof of another length claims a tree of
+    # another height, and its nodes must not stand in for this one's
+    tables: dict[int, list[dict[int, tuple[bytes, list[bytes]]]]] = {}
+    out = []
+    for leaf, index, proof in items:
+        proven = tables.setdefault(len(proof), [{} for _ in proof])
+        accs = [] # digest of this proof's node at each level climbed
+        acc = new(leaf).digest()
+        ok = None
+        for h, sib in enumerate(proof):
+            known = proven[h].get(index >> h)
+            if known is not None:
+                # from a proven node up, an honest proof repeats the
+                # siblings of the proof that proved it
+                node, ref = known
+                ok = node == acc and proof[h:] == ref[h:]
+                break
+            accs.append(acc)
+            acc = new(sib + acc).digest() if (index >> h) & 1 else new(acc + sib).digest()
+        if ok is None:
+            ok = acc == root
+
+        if ok:
+            for h, node in enumerate(accs):
+                proven[h][index >> h] = (node, proof)
+        out.append(ok)
+    return out
+
+def verify_multiproof(leaves: list[bytes], indices: list[int], proof: list[bytes], root: bytes,
+                      hasher="sha256") -> bool:
+    """Check a MerkleTree.multiproof. Every known node is hashed once per
+    level, so ancestors shared by several leaves are computed only once.
+    The height is not sent: climbing stops once only node 0 is left and
+    the proof is used up."""
+    new = get_hasher(hasher)
+    known: dict[int, bytes] = {}
+    for i, leaf in zip(indices, leaves, strict=True):
+        digest = new(leaf).digest()
+        if known.setdefault(i, digest) != digest:
+            return False # same index, different leaf
+    if not known:
+        return False
+
+    idx = sorted(known)
+    vals = [known[i] for i in idx]
+    p = 0
+    while idx != [0] or p < len(proof):
+        up, up_vals = [], []
+        j = 0
+        while j < len(idx):
+            i = idx[j]
+            if i & 1 == 0 and j + 1 < len(idx) and idx[j + 1] == i + 1:
+                digest = new(vals[j] + vals[j + 1]).digest()
+                j += 2
+            else:
+                if p == len(proof):
+                    return False
+                sib = proof[p]
+                p += 1
+                digest = new(sib + vals[j]).digest() if i & 1 else new(vals[j] + sib).digest()
+                j += 1
+            up.append(i >> 1)
+            up_vals.append(digest)
+        idx, vals = up, up_vals
+    return vals[0] == root
+
+def read_chunks(path, chunk_size: int, use_mmap=False):
+    """Yield a file's bytes chunk_size at a time (the last chunk may be short)."""
+    with open(path, "rb") as f:
+        if use_mmap:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for off in range(0, size, chunk_size):
+                    yield mm[off:off + chunk_size]
+        else:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+def merkle_root_stream(source, chunk_size=4096, hasher="sha256", use_mmap=False) -> bytes:
+    """Root of MerkleTree(list(source)) without holding the leaves.
+
+    source is any iterable of leaves, or a file path whose chunk_size
+    byte chunks are the leaves. pending[h] holds the root of a finished
+    left subtree of height h that still waits for its right sibling, so
+    memory is one digest per level. At the end the leftovers are folded
+    upwards with zero[h] standing in for the missing right halves, which
+    is exactly the padding MerkleTree uses.
+    """
+    new = get_hasher(hasher)
+    if isinstance(source, (str, os.PathLike)):
+        source = read_chunks(source, chunk_size, use_mmap)
+
+    pending: list[bytes | None] = []
+    n = 0
+    for leaf in source:
+        acc = new(leaf).digest()
+        h = 0
+        while h < len(pending) and pending[h] is not None:
+            acc = new(pending[h] + acc).digest()
+            pending[h] = None
+            h += 1
+        if h == len(pending):
+            pending.append(acc)
+        else:
+            pending[h] = acc
+        n += 1
+
+    if n == 0:
+        return new(b"").digest()
+    height = next_pow2(n).bit_length() - 1
+    if len(pending) > height:
+        return pending[height] # n is a power of two, nothing to pad
+
+    zero = build_zero_hashes(height, new)
+    carry = None
+    for h in range(height):
+        if pending[h] is not None:
+            carry = new(pending[h] + (zero[h] if carry is None else carry)).digest()
+        elif carry is not None:
+            carry = new(carry + zero[h]).digest()
+    return carry
 
 class MerkleImplicit:
     def __init__(self, leaves: list[bytes]):
@@ -168,7 +517,7 @@ class MerkleImplicit:
         if not (0 <= i < self.n):
             raise IndexError("leaf index out of range")
         self.leaves[i] = new_leaf
-        self._cache.clear()
+        self._evict_path(i)
 
     def append(self, new_leaf: bytes) -> None:
         self.leaves.append(new_leaf)
@@ -182,7 +531,14 @@ class MerkleImplicit:
                 z = self.zero[-1]
                 self.zero.append(sha256(z + z))
             self.height = new_height
-        self._cache.clear()
+        # cached subtrees don't depend on the height, so growing keeps them;
+        # only the nodes above the new leaf have changed
+        self._evict_path(self.n - 1)
+
+    def _evict_path(self, i: int) -> None:
+        # drop the cached hashes of every node covering leaf i
+        for h in range(1, self.height + 1):
+            self._cache.pop(((i >> h) << h, h), None)
 
     def proof(self, i: int) -> list[tuple[bytes, str]]:
         if not (0 <= i < self.n):
@@ -226,46 +582,120 @@ class MerkleImplicit:
             acc = sha256(sib_hash + acc) if bit else sha256(acc + sib_hash)
         return acc
 
-m = MerkleImplicit([b'a', b'b', b'c'])
-print(m.root().hex())
-print(m.proof(1))
-
-# implicit
-mi = MerkleImplicit([b'a', b'b', b'c'])
-assert verify(b'b', mi.proof(1), mi.root())
-
-# cross-check with explicit tree
-mt = MerkleTree([b'a', b'b', b'c'])
-assert mi.root() == mt.root()
-for i, leaf in enumerate([b'a', b'b', b'c']):
-    assert verify(leaf, mi.proof(i), mi.root())
-
-old_root = mi.root()
-mi.update(1, b'B')
-new_root = mi.root()
-assert new_root != old_root
-assert verify(b'B', mi.proof(1), new_root)
-
-r1 = mi.root()
-mi.append(b'd')
-mi.append(b'i')             # crosses from capacity 4? (n=3→4) height stays same; still fine
-r2 = mi.root()
-assert r2 != r1
-assert verify(b'd', mi.proof(3), r2)
-
-mi2 = MerkleImplicit([b'a', b'b', b'c'])
-r2 = mi2.root()
-for i, leaf in enumerate(mi2.leaves):
-    p = mi2.proof_indexed(i)
-    assert verify_indexed(leaf, p, i, r2)
-
-r0 = mi2.root()
-
-# Preview the root if we changed index 1 from b'b' -> b'B' (without mutating the tree)
-r_preview = mi2.recompute_root_with(1, b'B')
-
-# Now actually apply the update and compare
-mi2.update(1, b'B')
-r1 = mi2.root()
-
-assert r_preview == r1   # should be true
\ No newline at end of file
+if __name__ == "__main__":
+    t1 = MerkleTree([b"a", b"b", b"c"])
+    t2 = MerkleTree([b"a", b"b", b"d"])
+    assert t1.root() != t2.root()
+    print(t1.root().hex(), t2.root().hex())
+
+    # 2) proofs verify for each real leaf
+    leaves = [b"a", b"b", b"c"]
+    t = MerkleTree(leaves)
+    for i, leaf in enumerate(leaves):
+        p = t.proof(i)
+        assert verify(leaf, p, t.root())
+
+    # 3) tamper detection
+    p_bad = list(t.proof(0))
+    p_bad[0] = (sha256(b"not-the-sibling"), p_bad[0][1])
+    assert not verify(leaves[0], p_bad, t.root())
+
+    # 4) updates change root and still verify
+    root_before = t.root()
+    t.update(1, b"B")
+    root_after = t.root()
+    assert root_after != root_before
+    assert verify(b"B", t.proof(1), root_after)
+
+    # 4b) batch updates land on the same root as one-by-one updates
+    t.update_many({0: b"A", 2: b"C"})
+    assert t.root() == MerkleTree([b"A", b"B", b"C"]).root()
+
+    # 4c) saved and mapped back, updates go to the file
+    import tempfile
+    saved = os.path.join(tempfile.mkdtemp(), "tree.mkl")
+    t.save(saved)
+    with MerkleTree.load(saved) as mapped:
+        assert mapped.root() == t.root() and mapped.proof(2) == t.proof(2)
+        mapped.update(0, b"a")
+    with MerkleTree.load(saved, writable=False) as mapped:
+        assert mapped.root() == MerkleTree([b"a", b"B", b"C"]).root()
+
+    # 4d) many proofs checked in one batch
+    batch = [(leaf, i, [sib for sib, _ in t.proof(i)]) for i, leaf in enumerate([b"A", b"B", b"C"])]
+    batch.append((b"forged", 0, batch[0][2]))
+    assert verify_batch(batch, t.root()) == [True, True, True, False]
+
+    # a short proof (one level up from node 1 of level 1) must not vouch
+    # for level-0 nodes of honest full-height proofs checked after it
+    t4 = MerkleTree([b"a", b"b", b"c", b"d"])
+    short = (t4.node(0, 2) + t4.node(0, 3), 1, [t4.node(1, 0)])
+    honest = (b"b", 1, [sib for sib, _ in t4.proof(1)])
+    expect = [verify_indexed(leaf, p, i, t4.root()) for leaf, i, p in (short, honest)]
+    assert expect == [True, True]
+    assert verify_batch([short, honest], t4.root()) == expect
+
+    # 5) edge cases: 0 or 1 leaf
+    t_empty = MerkleTree([])
+    t_one = MerkleTree([b"solo"])
+    assert t_empty.root() == sha256(b"")
+    assert verify(b"solo", t_one.proof(0), t_one.root())
+
+    # 6) parallel build gives the same levels, padding included
+    many = [bytes([i]) * 3 for i in range(100)]
+    assert MerkleTree.build_parallel(many, workers=3).levels == MerkleTree(many).levels
+
+    # 7) streaming root matches without keeping the leaves
+    assert merkle_root_stream(iter(many)) == MerkleTree(many).root()
+
+    # 8) one multiproof for several leaves
+    big = MerkleTree(many)
+    picks = [3, 4, 5, 60, 99]
+    mp = big.multiproof(picks)
+    assert len(mp) < sum(len(big.proof(i)) for i in picks)
+    assert verify_multiproof([many[i] for i in picks], picks, mp, big.root())
+    assert not verify_multiproof([many[i] for i in picks], picks, mp[1:], big.root())
+
+    m = MerkleImplicit([b'a', b'b', b'c'])
+    print(m.root().hex())
+    print(m.proof(1))
+
+    # implicit
+    mi = MerkleImplicit([b'a', b'b', b'c'])
+    assert verify(b'b', mi.proof(1), mi.root())
+
+    # cross-check with explicit tree
+    mt = MerkleTree([b'a', b'b', b'c'])
+    assert mi.root() == mt.root()
+    for i, leaf in enumerate([b'a', b'b', b'c']):
+        assert verify(leaf, mi.proof(i), mi.root())
+
+    old_root = mi.root()
+    mi.update(1, b'B')
+    new_root = mi.root()
+    assert new_root != old_root
+    assert verify(b'B', mi.proof(1), new_root)
+
+    r1 = mi.root()
+    mi.append(b'd')
+    mi.append(b'i')             # crosses from capacity 4? (n=3→4) height stays same; still fine
+    r2 = mi.root()
+    assert r2 != r1
+    assert verify(b'd', mi.proof(3), r2)
+
+    mi2 = MerkleImplicit([b'a', b'b', b'c'])
+    r2 = mi2.root()
+    for i, leaf in enumerate(mi2.leaves):
+        p = mi2.proof_indexed(i)
+        assert verify_indexed(leaf, p, i, r2)
+
+    r0 = mi2.root()
+
+    # Preview the root if we changed index 1 from b'b' -> b'B' (without mutating the tree)
+    r_preview = mi2.recompute_root_with(1, b'B')
+
+    # Now actually apply the update and compare
+    mi2.update(1, b'B')
+    r1 = mi2.root()
+
+    assert r_preview == r1   # should be true
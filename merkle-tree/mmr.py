@@ -0,0 +1,348 @@
+import os
+
+from main import DIGEST, get_hasher
+
+# A Merkle mountain range is a list of perfect Merkle trees ("peaks") with
+# strictly decreasing heights, one per set bit of the leaf count. Nodes are
+# numbered in postorder, so appending only ever adds nodes at the end and
+# nothing that is already stored changes.
+
+
+def node_pos(start: int, h: int) -> int:
+    """Postorder position of the height-h node whose leftmost leaf is start."""
+    return 2 * start - start.bit_count() + (1 << (h + 1)) - 2
+
+
+def peak_ranges(n: int) -> list[tuple[int, int]]:
+    """(first leaf, height) of each peak of an n-leaf range, left to right."""
+    out = []
+    start = 0
+    for h in range(n.bit_length() - 1, -1, -1):
+        if n >> h & 1:
+            out.append((start, h))
+            start += 1 << h
+    return out
+
+
+def mmr_size(n: int) -> int:
+    """Node count of an n-leaf range."""
+    return 2 * n - n.bit_count()
+
+
+def leaves_for_size(size: int) -> int:
+    """Most leaves whose nodes all fit in size stored nodes. This is the
+    inverse of mmr_size when size is one of its values; anything past
+    mmr_size(result) is the tail of an append that never finished."""
+    # each peak of height h holds 2^(h+1) - 1 nodes, so take the biggest
+    # peaks first
+    n = 0
+    for h in range(size.bit_length(), -1, -1):
+        nodes = (1 << (h + 1)) - 1
+        if size >= nodes:
+            size -= nodes
+            n += 1 << h
+    return n
+
+
+def bag_peaks(peaks: list[bytes], hasher="sha256") -> bytes:
+    """Fold the peaks right to left into one root. With a single peak (n a
+    power of two) this is the MerkleTree root of the same leaves."""
+    new = get_hasher(hasher)
+    if not peaks:
+        return new(b"").digest()
+    acc = peaks[-1]
+    for p in reversed(peaks[:-1]):
+        acc = new(p + acc).digest()
+    return acc
+
+
+class MemoryStore:
+    """Node digests packed into one bytearray, indexed by position."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def __len__(self):
+        return len(self.buf) // DIGEST
+
+    def append(self, digest: bytes):
+        self.buf += digest
+
+    def get(self, pos: int) -> bytes:
+        return bytes(self.buf[pos * DIGEST:(pos + 1) * DIGEST])
+
+    def truncate(self, count: int):
+        del self.buf[count * DIGEST:]
+
+    def close(self):
+        pass
+
+
+class FileStore:
+    """Append-only file of node digests. Reads are single pread calls, so
+    only the nodes a proof needs are ever read back."""
+
+    def __init__(self, path):
+        # raw fd, so reads see every append without a flush
+        self.fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self.count = os.fstat(self.fd).st_size // DIGEST
+        # a crash can leave part of a digest at the end, drop it
+        os.ftruncate(self.fd, self.count * DIGEST)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, digest: bytes):
+        os.write(self.fd, digest)
+        self.count += 1
+
+    def get(self, pos: int) -> bytes:
+        return os.pread(self.fd, DIGEST, pos * DIGEST)
+
+    def truncate(self, count: int):
+        os.ftruncate(self.fd, count * DIGEST)
+        self.count = count
+
+    def close(self):
+        os.close(self.fd)
+
+
+class MMR:
+    """Append-only Merkle accumulator.
+
+    append() hashes the new leaf and then merges equal-height peaks, so
+    old nodes are never rehashed; it costs one hash amortised and log n
+    at worst. Every node goes to the store (a file when path is given,
+    else a bytearray, so O(n) memory), which is what proofs and roots at
+    older sizes are served from. Opening an existing file reads just the
+    peaks.
+
+    With store=False no nodes are kept: the MMR holds only its peaks,
+    O(log n) digests, and can give the current root but no proofs.
+    """
+
+    def __init__(self, path=None, hasher="sha256", store=True):
+        self.new = get_hasher(hasher)
+        if not store:
+            if path is not None:
+                raise ValueError("a file MMR always has a store")
+            self.store = None
+            self.n = 0
+            self.peaks = []
+            return
+        self.store = FileStore(path) if path is not None else MemoryStore()
+        self.n = leaves_for_size(len(self.store))
+        if mmr_size(self.n) < len(self.store):
+            # an append was cut short (a leaf written, not all its merges);
+            # roll back to the last complete one
+            self.store.truncate(mmr_size(self.n))
+        self.peaks = self._stored_peaks(self.n)
+
+    def __len__(self):
+        return self.n
+
+    def append(self, leaf: bytes) -> int:
+        """Add a leaf and return its index."""
+        new = self.new
+        store = self.store
+        acc = new(leaf).digest()
+        if store is not None:
+            store.append(acc)
+        # the low set bits of n are the peaks the new leaf merges with
+        n = self.n
+        while n & 1:
+            acc = new(self.peaks.pop() + acc).digest()
+            if store is not None:
+                store.append(acc)
+            n >>= 1
+        self.peaks.append(acc)
+        self.n += 1
+        return self.n - 1
+
+    def root(self, size=None) -> bytes:
+        """Root now, or as it was when the MMR had size leaves."""
+        return bag_peaks(self._peaks_at(size), self.new)
+
+    def proof(self, index: int, size=None):
+        """Inclusion proof of leaf index against root(size): the sibling
+        path up to the leaf's peak and the other peaks, left to right."""
+        self._need_store()
+        size = self.n if size is None else size
+        if not (0 <= index < size <= self.n):
+            raise IndexError("leaf index out of range")
+        ranges = peak_ranges(size)
+        k = _peak_of(ranges, index)
+        path = []
+        for h in range(ranges[k][1]):
+            sib = ((index >> h) << h) ^ (1 << h)
+            path.append(self.store.get(node_pos(sib, h)))
+        peaks = self._peaks_at(size)
+        return path, peaks[:k] + peaks[k + 1:]
+
+    def consistency_proof(self, old_size: int, new_size=None):
+        """Proof that root(old_size) is a prefix of root(new_size): the old
+        peaks plus the nodes covering only leaves added since, in the order
+        verify_consistency rebuilds the new peaks in."""
+        self._need_store()
+        new_size = self.n if new_size is None else new_size
+        if not (0 <= old_size <= new_size <= self.n):
+            raise IndexError("sizes out of range")
+        old = set(peak_ranges(old_size))
+        fresh = []
+        for start, h in peak_ranges(new_size):
+            stack = [(start, h)]
+            while stack:
+                s, h = stack.pop()
+                if s >= old_size:
+                    fresh.append(self.store.get(node_pos(s, h)))
+                elif (s, h) not in old:
+                    half = 1 << (h - 1)
+                    stack.append((s + half, h - 1))
+                    stack.append((s, h - 1))
+        return self._peaks_at(old_size), fresh
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _peaks_at(self, size):
+        if size is None or size == self.n:
+            return list(self.peaks)
+        if not (0 <= size <= self.n):
+            raise IndexError("size out of range")
+        self._need_store()
+        return self._stored_peaks(size)
+
+    def _need_store(self):
+        if self.store is None:
+            raise ValueError("MMR has no store, only the current root is known")
+
+    def _stored_peaks(self, size):
+        return [self.store.get(node_pos(s, h)) for s, h in peak_ranges(size)]
+
+
+def _peak_of(ranges, index):
+    for k, (start, h) in enumerate(ranges):
+        if index < start + (1 << h):
+            return k
+    raise IndexError("leaf index out of range")
+
+
+def verify_inclusion(leaf: bytes, index: int, size: int, proof, root: bytes,
+                     hasher="sha256") -> bool:
+    new = get_hasher(hasher)
+    path, others = proof
+    if not 0 <= index < size:
+        return False
+    ranges = peak_ranges(size)
+    k = _peak_of(ranges, index)
+    if len(path) != ranges[k][1] or len(others) != len(ranges) - 1:
+        return False
+    acc = new(leaf).digest()
+    for h, sib in enumerate(path):
+        acc = new(sib + acc).digest() if (index >> h) & 1 else new(acc + sib).digest()
+    return bag_peaks(others[:k] + [acc] + others[k:], new) == root
+
+
+def verify_consistency(old_size: int, new_size: int, old_root: bytes, new_root: bytes,
+                       proof, hasher="sha256") -> bool:
+    new = get_hasher(hasher)
+    old_peaks, fresh = proof
+    if not 0 <= old_size <= new_size:
+        return False
+    old_ranges = peak_ranges(old_size)
+    if len(old_peaks) != len(old_ranges) or bag_peaks(old_peaks, new) != old_root:
+        return False
+
+    # rebuild each new peak from the old peaks and the fresh subtrees
+    known = dict(zip(old_ranges, old_peaks))
+    it = iter(fresh)
+
+    def node(s, h):
+        if s >= old_size:
+            return next(it) # StopIteration if the proof is short
+        if (s, h) in known:
+            return known[s, h]
+        half = 1 << (h - 1)
+        left = node(s, h - 1)
+        return new(left + node(s + half, h - 1)).digest()
+
+    try:
+        peaks = [node(s, h) for s, h in peak_ranges(new_size)]
+    except StopIteration:
+        return False
+    if next(it, None) is not None:
+        return False # leftover digests
+    return bag_peaks(peaks, new) == new_root
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from main import MerkleTree
+
+    leaves = [f"entry-{i}".encode() for i in range(37)]
+    mmr = MMR()
+    roots = [mmr.root()]
+    for leaf in leaves:
+        mmr.append(leaf)
+        roots.append(mmr.root())
+
+    # one peak means a plain Merkle tree
+    assert roots[32] == MerkleTree(leaves[:32]).root()
+
+    # inclusion against today's root and an old one
+    for size in (5, 20, 37):
+        for i in range(size):
+            assert verify_inclusion(leaves[i], i, size, mmr.proof(i, size), roots[size])
+    assert not verify_inclusion(b"forged", 3, 37, mmr.proof(3), roots[37])
+
+    # every old root is a prefix of every later one
+    for old in range(0, 38, 3):
+        for later in range(old, 38, 4):
+            p = mmr.consistency_proof(old, later)
+            assert verify_consistency(old, later, roots[old], roots[later], p)
+    assert not verify_consistency(10, 37, roots[11], roots[37], mmr.consistency_proof(10))
+
+    # on disk, reopened later
+    path = os.path.join(tempfile.mkdtemp(), "log.mmr")
+    with MMR(path) as disk:
+        for leaf in leaves[:20]:
+            disk.append(leaf)
+    with MMR(path) as disk:
+        assert len(disk) == 20 and disk.root() == roots[20]
+        for leaf in leaves[20:]:
+            disk.append(leaf)
+        assert disk.root() == roots[37]
+        assert verify_inclusion(leaves[7], 7, 37, disk.proof(7), roots[37])
+
+    # a crash in the middle of an append: leaf 24 merges with three peaks,
+    # so it writes four nodes; keep two and half of the third
+    with open(path, "r+b") as f:
+        f.truncate((mmr_size(23) + 2) * DIGEST + DIGEST // 2)
+    with MMR(path) as disk:
+        assert len(disk) == 23 and disk.root() == roots[23]
+        assert len(disk.store) == mmr_size(23)
+        disk.append(leaves[23])
+        assert disk.root() == roots[24]
+
+    # without a store only the peaks are kept
+    light = MMR(store=False)
+    for leaf in leaves:
+        light.append(leaf)
+    assert light.root() == roots[37] and len(light.peaks) == (37).bit_count()
+    for call in (lambda: light.proof(3), lambda: light.consistency_proof(10),
+                 lambda: light.root(20)):
+        try:
+            call()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("store-less MMR served a proof")
+    print("ok", roots[37].hex())
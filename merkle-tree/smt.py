@@ -0,0 +1,137 @@
+from main import DIGEST, build_zero_hashes, get_hasher
+
+DEPTH = 256 # keys are 32 bytes, one tree level per key bit
+
+_zero_cache = {} # hasher -> zero hashes up to DEPTH, shared by trees and verifiers
+
+
+def sparse_zero_hashes(new) -> list[bytes]:
+    if new not in _zero_cache:
+        _zero_cache[new] = build_zero_hashes(DEPTH, new)
+    return _zero_cache[new]
+
+
+class SparseMerkleTree:
+    """Merkle tree over the 2^256 slots addressed by 32-byte keys.
+
+    Slot bits are read from the least significant end going up, like the
+    leaf index in MerkleTree, so slot k is leaf int.from_bytes(k, "big").
+    Almost every subtree is empty and hashes to zero[h], so the node store
+    is a dict keyed by (height, key >> height) holding only nodes that
+    differ from zero[h]. Leaves hash their value like MerkleTree leaves;
+    an absent key is the empty-subtree leaf zero[0] = H(b""), which makes
+    storing b"" the same as deleting the key.
+    """
+
+    def __init__(self, hasher="sha256"):
+        self.new = get_hasher(hasher)
+        self.zero = sparse_zero_hashes(self.new)
+        self.nodes: dict[tuple[int, int], bytes] = {}
+        self.values: dict[bytes, bytes] = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key: bytes):
+        return key in self.values
+
+    def root(self) -> bytes:
+        return self.nodes.get((DEPTH, 0), self.zero[DEPTH])
+
+    def get(self, key: bytes, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key: bytes, value: bytes) -> None:
+        path = _path(key)
+        if value:
+            self.values[key] = value
+            acc = self.new(value).digest()
+        else:
+            self.values.pop(key, None)
+            acc = self.zero[0]
+
+        # rehash the 256 nodes above the slot, dropping any that turn empty
+        new, nodes, zero = self.new, self.nodes, self.zero
+        for h in range(DEPTH):
+            prefix = path >> h
+            if acc == zero[h]:
+                nodes.pop((h, prefix), None)
+            else:
+                nodes[h, prefix] = acc
+            sib = nodes.get((h, prefix ^ 1), zero[h])
+            acc = new(sib + acc).digest() if prefix & 1 else new(acc + sib).digest()
+        if acc == zero[DEPTH]:
+            nodes.pop((DEPTH, 0), None)
+        else:
+            nodes[DEPTH, 0] = acc
+
+    def delete(self, key: bytes) -> None:
+        self.set(key, b"")
+
+    def proof(self, key: bytes) -> tuple[int, list[bytes]]:
+        """(bitmap, siblings): bit h of bitmap is set when the level-h
+        sibling is not an empty subtree, and only those siblings are sent,
+        bottom up. Works the same for absent keys (non-membership)."""
+        path = _path(key)
+        bitmap = 0
+        siblings = []
+        for h in range(DEPTH):
+            sib = self.nodes.get((h, (path >> h) ^ 1))
+            if sib is not None:
+                bitmap |= 1 << h
+                siblings.append(sib)
+        return bitmap, siblings
+
+
+def _path(key: bytes) -> int:
+    if len(key) != DIGEST:
+        raise ValueError("sparse Merkle tree keys are 32 bytes")
+    return int.from_bytes(key, "big")
+
+
+def verify_sparse(key: bytes, value, proof: tuple[int, list[bytes]], root: bytes,
+                  hasher="sha256") -> bool:
+    """Check that key holds value under root; value None (or b"") checks
+    that the key is absent."""
+    new = get_hasher(hasher)
+    zero = sparse_zero_hashes(new)
+    bitmap, siblings = proof
+    if bitmap >> DEPTH or bitmap.bit_count() != len(siblings):
+        return False
+
+    path = _path(key)
+    acc = new(value).digest() if value else zero[0]
+    it = iter(siblings)
+    for h in range(DEPTH):
+        sib = next(it) if bitmap >> h & 1 else zero[h]
+        acc = new(sib + acc).digest() if path >> h & 1 else new(acc + sib).digest()
+    return acc == root
+
+
+if __name__ == "__main__":
+    import hashlib
+
+    def key_of(name: str) -> bytes:
+        return hashlib.sha256(name.encode()).digest()
+
+    smt = SparseMerkleTree()
+    empty_root = smt.root()
+    state = {key_of(f"account-{i}"): f"balance {i * 10}".encode() for i in range(50)}
+    for k, v in state.items():
+        smt.set(k, v)
+    root = smt.root()
+
+    k0 = key_of("account-0")
+    assert smt.get(k0) == b"balance 0"
+    bitmap, siblings = smt.proof(k0)
+    assert verify_sparse(k0, b"balance 0", (bitmap, siblings), root)
+    assert not verify_sparse(k0, b"balance 1", (bitmap, siblings), root)
+    print("membership proof:", len(siblings), "of", DEPTH, "siblings sent")
+
+    missing = key_of("nobody")
+    assert verify_sparse(missing, None, smt.proof(missing), root)
+    assert not verify_sparse(k0, None, smt.proof(k0), root)
+
+    for k in state:
+        smt.delete(k)
+    assert smt.root() == empty_root and not smt.nodes